@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark for generate_panel_linkage on large synthetic sheets
+Compares the indexed linkage with the original quadratic scan
+
+Usage: python examples/benchmark_panel_linkage.py [num_peptides] [--legacy]
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add src directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from cleavage_mapper import AdvancedCleavageMapper, PeptideTable
+
+AMINO_ACIDS = 'ACDEFGHIKLMNPQRSTVWY'
+
+
+def legacy_panel_linkage(left_structure, right_structure):
+    """Original implementation: every left group scans every right row"""
+    linkage = {}
+    for left_group in left_structure:
+        left_seqs = [s['data']['clean'] for s in left_group['sequences']]
+        matching_right_rows = []
+        for right_group in right_structure:
+            for seq_row in right_group['sequences']:
+                if seq_row['data']['clean'] in left_seqs:
+                    matching_right_rows.append(seq_row['row'])
+        if matching_right_rows:
+            linkage[left_group['start_row']] = (min(matching_right_rows), max(matching_right_rows))
+    return linkage
+
+
+def synthetic_sheet(num_peptides, reference_length=3000, num_samples=7, seed=0):
+    """Random reference plus peptides cut from it, in the parsed table format"""
+    rng = random.Random(seed)
+    reference = ''.join(rng.choice(AMINO_ACIDS) for _ in range(reference_length))
+    
+    clean = []
+    for _ in range(num_peptides):
+        start = rng.randrange(reference_length - 60)
+        clean.append(reference[start:start + rng.randint(6, 60)])
+    
+    table = PeptideTable(
+        number=list(range(1, num_peptides + 1)),
+        original=[f"({c[0]}){c[1:-1]}({c[-1]})" for c in clean],
+        clean=clean,
+        left_cleavage=[c[0] for c in clean],
+        right_cleavage=[c[-1] for c in clean],
+        intensities=[[rng.random() * 1e6 for _ in range(num_samples)] for _ in clean]
+    )
+    return {'reference': reference, 'sequences': table}
+
+
+def panel_structures(mapper, raw_data):
+    """Left and right panel structures of one parsed sheet"""
+    analysis = mapper.analyze_sequence_structure(raw_data['sequences'], raw_data['reference'])
+    left = mapper.build_left_panel_structure(analysis['n_terminal_groups'])
+    right = mapper.build_right_panel_structure(analysis['c_terminal_groups'], analysis['sequences'])
+    return left, right
+
+
+def compare(mapper, num_peptides, seed=0):
+    """Time both implementations on the same sheet and check they agree"""
+    left, right = panel_structures(mapper, synthetic_sheet(num_peptides, seed=seed))
+    print(f"\n--- {num_peptides:,} peptides, {len(left)} left groups ---")
+    
+    start = time.perf_counter()
+    linkage = mapper.generate_panel_linkage(left, right)
+    indexed = time.perf_counter() - start
+    print(f"Indexed linkage: {indexed:.3f}s ({num_peptides:,} peptides)")
+    
+    start = time.perf_counter()
+    expected = legacy_panel_linkage(left, right)
+    legacy = time.perf_counter() - start
+    print(f"Legacy linkage:  {legacy:.3f}s ({num_peptides:,} peptides)")
+    
+    assert linkage == expected, "Indexed linkage differs from the legacy scan"
+    print(f"✓ Results match, speedup {legacy / max(indexed, 1e-9):.1f}x")
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    num_peptides = int(args[0]) if args else 50000
+    run_legacy = '--legacy' in sys.argv
+    
+    # Lazy mode: the workbook is never opened, only the analysis methods are used
+    mapper = AdvancedCleavageMapper('unused.xlsx', lazy=True)
+    print(f"=== Panel linkage benchmark: {num_peptides:,} peptides ===")
+    
+    if run_legacy:
+        compare(mapper, num_peptides)
+        return
+    
+    # The quadratic scan takes minutes at full size, so by default only the
+    # indexed linkage runs at full size and both are compared on a subset
+    left, right = panel_structures(mapper, synthetic_sheet(num_peptides))
+    start = time.perf_counter()
+    mapper.generate_panel_linkage(left, right)
+    print(f"Indexed linkage: {time.perf_counter() - start:.3f}s ({num_peptides:,} peptides, {len(left)} left groups)")
+    
+    compare(mapper, min(num_peptides, 2000))
+    print("(pass --legacy to compare both at full size)")
+
+
+if __name__ == "__main__":
+    main()
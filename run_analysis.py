@@ -4,10 +4,11 @@ SIMPLE CLEAVAGE MAPPER - Command Line Version
 Easy-to-use command line interface for peptide cleavage analysis
 
 Usage: python run_analysis.py [your_excel_file.xlsx]
+       python run_analysis.py "exports/*.xlsx" --jobs 8     (batch mode)
 """
 
+import glob
 import sys
-import os
 from pathlib import Path
 import argparse
 
@@ -22,10 +23,34 @@ def main():
     
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Analyze peptide cleavage data')
-    parser.add_argument('excel_file', nargs='?', help='Excel file to analyze')
+    parser.add_argument('excel_file', nargs='?', 
+                        help='Excel file (or CSV/TSV/Parquet peptide table) to analyze; '
+                             'a directory or glob pattern runs batch mode')
     parser.add_argument('--output', '-o', help='Output directory', default='cleavage_results')
     parser.add_argument('--samples', '-s', help='Sample names (comma-separated)')
     parser.add_argument('--worksheets', '-w', help='Worksheet names (comma-separated)')
+    parser.add_argument('--jobs', '-j', type=int, 
+                        help='Worker processes: one per worksheet for a single workbook, '
+                             'one per sheet job in batch mode (default there: one per CPU)')
+    parser.add_argument('--pipeline', action='store_true',
+                        help='Overlap parsing, sheet writing and figure rendering (renders use --jobs processes)')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the parsed-worksheet cache')
+    parser.add_argument('--clear-cache', action='store_true', help='Clear the parsed-worksheet cache before running')
+    parser.add_argument('--cache-max-mb', type=int, default=256, help='Parsed-worksheet cache size limit in MB')
+    parser.add_argument('--processed-only', action='store_true',
+                        help='Write only the processed sheets to the results workbook (low memory)')
+    parser.add_argument('--multi-map', choices=['first', 'split', 'all', 'exclude'], default='first',
+                        help='How peptides found more than once in the reference are attributed')
+    parser.add_argument('--summary', choices=['formulas', 'values', 'both'], default='formulas',
+                        help='Write group sums/percentages as Excel formulas, computed values, or both')
+    parser.add_argument('--cleavage-residues', choices=['notation', 'reference', 'auto'], default='notation',
+                        help='Take cleavage residues from (X) notation, from the reference, or notation when present')
+    table = parser.add_argument_group('peptide table input (CSV/TSV/Parquet)')
+    table.add_argument('--reference', help='Reference sequence')
+    table.add_argument('--reference-column', help='Column holding the reference sequence')
+    table.add_argument('--sequence-column', default='Sequence', help='Peptide sequence column')
+    table.add_argument('--intensity-columns', help='Sample intensity columns (comma-separated, default: all numeric)')
+    table.add_argument('--number-column', help='Peptide number column')
     args = parser.parse_args()
     
     # Check if GUI should be launched
@@ -40,18 +65,18 @@ def main():
             print("Usage: python run_analysis.py your_file.xlsx")
             return
     
-    # Validate file exists
+    # Validate file exists (a directory or glob pattern means batch mode)
     excel_file = Path(args.excel_file)
-    if not excel_file.exists():
+    batch_mode = excel_file.is_dir() or glob.has_magic(args.excel_file)
+    if not batch_mode and not excel_file.exists():
         print(f"❌ Error: File '{excel_file}' not found")
         return
     
-    print(f"📁 Input file: {excel_file}")
+    print(f"📁 {'Batch input' if batch_mode else 'Input file'}: {excel_file}")
     
     try:
         # Import required modules
-        from cleavage_mapper import AdvancedCleavageMapper
-        import pandas as pd
+        from cleavage_mapper import AdvancedCleavageMapper, ParseDiskCache, batch_process, is_legacy_xls
         import openpyxl
         
         # Setup output directory (ensure it's in the output folder)
@@ -62,28 +87,56 @@ def main():
         output_dir.mkdir(parents=True, exist_ok=True)
         print(f"📂 Output directory: {output_dir}")
         
-        # Handle old Excel format
+        # Parsed-worksheet cache lives next to the output directory
+        cache_dir = None
+        if not args.no_cache:
+            cache_dir = output_dir.parent / '.parse_cache'
+            if args.clear_cache:
+                ParseDiskCache(str(cache_dir)).clear()
+                print("🧹 Cleared parse cache")
+            cache_dir = str(cache_dir)
+        
+        mapper_options = {
+            'cache_dir': cache_dir,
+            'cache_max_bytes': args.cache_max_mb * 1024 * 1024,
+            'multi_map_policy': args.multi_map,
+            'summary_values': args.summary,
+            'cleavage_residues': args.cleavage_residues,
+            'table_options': {
+                'reference': args.reference,
+                'reference_column': args.reference_column,
+                'sequence_column': args.sequence_column,
+                'intensity_columns': ([c.strip() for c in args.intensity_columns.split(',')]
+                                      if args.intensity_columns else None),
+                'number_column': args.number_column
+            }
+        }
+        
+        # Batch mode: every workbook/sheet is a job on a process pool
+        if batch_mode:
+            batch_process(
+                [str(excel_file)], str(output_dir),
+                worksheets=[w.strip() for w in args.worksheets.split(',')] if args.worksheets else None,
+                sample_labels=[s.strip() for s in args.samples.split(',')] if args.samples else None,
+                jobs=args.jobs,
+                mapper_options=mapper_options
+            )
+            print(f"\n🎉 BATCH COMPLETE! Results folder: {output_dir}")
+            return
+        
+        # Old Excel (.xls) workbooks are read directly, one sheet at a time
         input_file = str(excel_file)
-        if excel_file.suffix == '.xls':
-            print("🔄 Converting old Excel format...")
-            excel_data = pd.ExcelFile(input_file, engine='xlrd')
-            converted_file = Path('data') / "converted_data.xlsx"
-            converted_file.parent.mkdir(exist_ok=True)
-            
-            with pd.ExcelWriter(str(converted_file), engine='openpyxl') as writer:
-                for sheet_name in excel_data.sheet_names:
-                    df = pd.read_excel(excel_data, sheet_name=sheet_name, header=None)
-                    df.to_excel(writer, sheet_name=sheet_name, index=False, header=False)
-            
-            input_file = str(converted_file)
-            print("✅ Conversion complete")
+        if is_legacy_xls(input_file):
+            print("📄 Reading legacy .xls workbook directly")
         
         # Initialize mapper
         print("🔬 Initializing cleavage mapper...")
-        mapper = AdvancedCleavageMapper(input_file)
+        mapper = AdvancedCleavageMapper(input_file,
+                                        output_mode='processed' if args.processed_only else 'workbook',
+                                        **mapper_options)
         
         # Get available worksheets
-        available_worksheets = mapper.wb.sheetnames
+        available_worksheets = mapper.sheetnames
         print(f"📋 Available worksheets: {', '.join(available_worksheets)}")
         
         # Determine which worksheets to process
@@ -114,43 +167,74 @@ def main():
         print()
         
         # Process each worksheet
-        conditions = []
+        valid_worksheets = []
         for worksheet in worksheets_to_process:
             if worksheet not in available_worksheets:
                 print(f"⚠️  Skipping '{worksheet}' - not found in file")
                 continue
-            
-            print(f"📊 Processing: {worksheet}")
-            
-            try:
-                # Process the data
-                output_name = f"{worksheet} PROCESSED"
-                mapper.process(worksheet, output_name, sample_names)
-                
-                # Create visualizations
-                safe_name = worksheet.replace(' ', '_').replace('/', '_')
-                prefix = str(output_dir / f"analysis_{safe_name}")
-                
-                viz_files = mapper.create_visualizations(
-                    worksheet, sample_names, prefix, top_n_peptides=25
-                )
-                
-                # Move visualization files to output directory
-                for viz_file in viz_files:
-                    if os.path.exists(viz_file):
-                        new_path = output_dir / os.path.basename(viz_file)
-                        if viz_file != str(new_path):
-                            os.rename(viz_file, str(new_path))
-                
+            valid_worksheets.append(worksheet)
+        
+        def output_prefix(worksheet):
+            safe_name = worksheet.replace(' ', '_').replace('/', '_')
+            return str(output_dir / f"analysis_{safe_name}")
+        
+        excel_output = output_dir / "cleavage_analysis_results.xlsx"
+        saved = False
+        
+        conditions = []
+        if args.pipeline:
+            # Staged pipeline: the next sheet is parsed while the previous one is
+            # written and its figures render; the save overlaps the last renders
+            results = mapper.run_pipeline(
+                [(w, f"{w} PROCESSED") for w in valid_worksheets], sample_names,
+                {w: output_prefix(w) for w in valid_worksheets}, output_path=str(excel_output),
+                render_workers=args.jobs, top_n_peptides=25
+            )
+            saved = True
+            for worksheet, result in zip(valid_worksheets, results):
+                if result['error']:
+                    print(f"❌ Error processing {worksheet}: {result['error']}")
+                    continue
                 conditions.append((worksheet, worksheet.replace(' mgd glucose', ' mgd')))
                 print(f"✅ Completed: {worksheet}")
+        elif args.jobs and args.jobs > 1 and len(valid_worksheets) > 1:
+            # Each worksheet is parsed, analyzed and rendered in its own process;
+            # only the processed rows come back to be merged into the workbook
+            print(f"⚙️  Processing {len(valid_worksheets)} worksheets on "
+                  f"{min(args.jobs, len(valid_worksheets))} worker processes")
+            results = mapper.process_sheets(
+                [(w, f"{w} PROCESSED") for w in valid_worksheets], sample_names,
+                {w: output_prefix(w) for w in valid_worksheets}, jobs=args.jobs, top_n_peptides=25
+            )
+            for worksheet, result in zip(valid_worksheets, results):
+                if result['error']:
+                    print(f"❌ Error processing {worksheet}: {result['error']}")
+                    continue
+                conditions.append((worksheet, worksheet.replace(' mgd glucose', ' mgd')))
+                print(f"✅ Completed: {worksheet}")
+        else:
+            for worksheet in valid_worksheets:
+                print(f"📊 Processing: {worksheet}")
                 
-            except Exception as e:
-                print(f"❌ Error processing {worksheet}: {str(e)}")
+                try:
+                    # Process the data
+                    output_name = f"{worksheet} PROCESSED"
+                    mapper.process(worksheet, output_name, sample_names)
+                    
+                    # Create visualizations (a single worksheet can still render in parallel)
+                    mapper.create_visualizations(
+                        worksheet, sample_names, output_prefix(worksheet), top_n_peptides=25, workers=args.jobs
+                    )
+                    
+                    conditions.append((worksheet, worksheet.replace(' mgd glucose', ' mgd')))
+                    print(f"✅ Completed: {worksheet}")
+                    
+                except Exception as e:
+                    print(f"❌ Error processing {worksheet}: {str(e)}")
         
         # Save Excel results
-        excel_output = output_dir / "cleavage_analysis_results.xlsx"
-        mapper.save(str(excel_output))
+        if not saved:
+            mapper.save(str(excel_output))
         print(f"💾 Excel results saved: {excel_output.name}")
         
         # Create comprehensive comparison if multiple conditions
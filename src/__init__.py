@@ -2,8 +2,10 @@
 Cleavage Mapper - Peptide Cleavage Analysis Tool
 """
 
-from .cleavage_mapper import AdvancedCleavageMapper
+from .cleavage_mapper import (AdvancedCleavageMapper, PeptideTable, ReferenceIndex, batch_process, bin_positions,
+                              positional_coverage, parse_cleavage_notation, read_peptide_table, register_input_adapter)
 
 __version__ = "1.0.0"
 __author__ = "Cleavage Mapper Team"
-__all__ = ["AdvancedCleavageMapper"]
\ No newline at end of file
+__all__ = ["AdvancedCleavageMapper", "PeptideTable", "ReferenceIndex", "batch_process", "bin_positions",
+           "positional_coverage", "parse_cleavage_notation", "read_peptide_table", "register_input_adapter"]
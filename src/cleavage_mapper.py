@@ -5,54 +5,1015 @@ Complete implementation with bidirectional panel linking
 
 import openpyxl
 from openpyxl.utils import get_column_letter
-import re
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from collections import defaultdict
-from typing import Dict, List, Tuple, Optional
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Tuple, Optional
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import seaborn as sns
 import numpy as np
 import pandas as pd
 
+class ReferenceIndex:
+    """
+    k-mer hash index of a reference sequence
+    Every k-mer of the reference maps to its start positions, so a peptide is
+    located with a few dict lookups and one verification per candidate
+    instead of a scan of the whole reference. Use ``for_reference`` to share
+    one index per reference string.
+    """
+    
+    def __init__(self, reference: str, k: int = 4):
+        self.reference = reference
+        self.k = k
+        kmers = defaultdict(list)
+        for i in range(len(reference) - k + 1):
+            kmers[reference[i:i + k]].append(i)
+        self._kmers = dict(kmers)
+    
+    @staticmethod
+    def for_reference(reference: str) -> 'ReferenceIndex':
+        """Cached index for ``reference``"""
+        return _reference_index(reference)
+    
+    def occurrences(self, peptide: str) -> List[int]:
+        """All start positions of ``peptide`` in the reference, ascending"""
+        reference = self.reference
+        if len(peptide) < self.k:
+            # Too short to anchor on a k-mer; fall back to a direct scan
+            hits = []
+            pos = reference.find(peptide)
+            while pos >= 0:
+                hits.append(pos)
+                pos = reference.find(peptide, pos + 1)
+            return hits
+        
+        # Anchor on the peptide's rarest k-mer to keep candidates few
+        best_offset, best_candidates = 0, None
+        for offset in range(len(peptide) - self.k + 1):
+            candidates = self._kmers.get(peptide[offset:offset + self.k])
+            if candidates is None:
+                return []
+            if best_candidates is None or len(candidates) < len(best_candidates):
+                best_offset, best_candidates = offset, candidates
+                if len(candidates) == 1:
+                    break
+        
+        return [pos - best_offset for pos in best_candidates
+                if pos >= best_offset and reference.startswith(peptide, pos - best_offset)]
+    
+    def locate_all(self, peptides: Iterable[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Every occurrence of every peptide, one index query per unique peptide
+        Returns (rows, starts, counts): ``rows``/``starts`` hold one entry per
+        hit (peptide index, start position), grouped by peptide in ascending
+        order, and ``counts`` the number of hits of each peptide.
+        """
+        peptides = list(peptides)
+        memo = {}
+        rows, starts = [], []
+        counts = np.zeros(len(peptides), dtype=np.int64)
+        for i, peptide in enumerate(peptides):
+            hits = memo.get(peptide)
+            if hits is None:
+                hits = memo[peptide] = self.occurrences(peptide)
+            counts[i] = len(hits)
+            rows.extend([i] * len(hits))
+            starts.extend(hits)
+        
+        return np.array(rows, dtype=np.int64), np.array(starts, dtype=np.int64), counts
+    
+    def locate(self, peptides: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Start/end (half-open) of the first occurrence of every peptide
+        Peptides that do not map get -1 for both.
+        """
+        peptides = list(peptides)
+        _, hit_starts, counts = self.locate_all(peptides)
+        
+        mapped = counts > 0
+        first_hit = np.cumsum(counts) - counts
+        starts = np.full(len(peptides), -1, dtype=np.int64)
+        starts[mapped] = hit_starts[first_hit[mapped]]
+        
+        lengths = np.fromiter((len(p) for p in peptides), dtype=np.int64, count=len(peptides))
+        ends = np.where(mapped, starts + lengths, -1)
+        return starts, ends
+
+
+@lru_cache(maxsize=32)
+def _reference_index(reference: str) -> ReferenceIndex:
+    return ReferenceIndex(reference)
+
+
+# How peptides that occur more than once in the reference are attributed:
+#   first   - only the first occurrence, with full intensity
+#   split   - every occurrence, intensity split evenly between them
+#   all     - every occurrence, each with full intensity
+#   exclude - ambiguous peptides are left out of positional analyses
+MULTI_MAP_POLICIES = ('first', 'split', 'all', 'exclude')
+
+
+def _check_multi_map_policy(policy: str) -> str:
+    if policy not in MULTI_MAP_POLICIES:
+        raise ValueError(f"Unknown multi-mapping policy {policy!r}; expected one of {', '.join(MULTI_MAP_POLICIES)}")
+    return policy
+
+
+class PeptideTable:
+    """
+    Columnar storage for the peptides of one parsed worksheet
+    Sequences are held in string columns, intensities in a 2-D
+    (peptides x samples) float matrix and cleavage residues as categoricals.
+    Iterating or indexing the table yields per-peptide dicts, so code written
+    against the original list-of-dicts ``sequences`` keeps working.
+    """
+    
+    def __init__(self, 
+                 number,
+                 original,
+                 clean,
+                 left_cleavage,
+                 right_cleavage,
+                 intensities):
+        self.number = np.asarray(number, dtype=object)
+        self.original = np.asarray(original, dtype=object)
+        self.clean = np.asarray(clean, dtype=object)
+        self.left_cleavage = pd.Categorical(left_cleavage)
+        self.right_cleavage = pd.Categorical(right_cleavage)
+        intensities = np.asarray(intensities, dtype=float)
+        # An empty table keeps the sample count of the matrix it was given
+        self.intensities = intensities.reshape(len(self.clean), intensities.shape[1] if intensities.ndim == 2 else 0) \
+            if len(self.clean) == 0 else intensities.reshape(len(self.clean), -1)
+        
+        # Reference positions, filled in by positions()
+        self.start = np.full(len(self.clean), -1, dtype=np.int64)
+        self.end = np.full(len(self.clean), -1, dtype=np.int64)
+        self._positions_reference = None
+        self._hits_cache = {}
+        self._coverage_cache = {}
+    
+    @classmethod
+    def from_records(cls, records: List[Dict]) -> 'PeptideTable':
+        """Build a table from the list-of-dicts ``sequences`` format"""
+        return cls(
+            [r['number'] for r in records],
+            [r['original'] for r in records],
+            [r['clean'] for r in records],
+            [r['left_cleavage'] for r in records],
+            [r['right_cleavage'] for r in records],
+            [r['intensities'] for r in records] if records else np.zeros((0, 0))
+        )
+    
+    @property
+    def num_samples(self) -> int:
+        return self.intensities.shape[1]
+    
+    @property
+    def lengths(self) -> np.ndarray:
+        """Clean sequence length of every peptide"""
+        return np.fromiter((len(s) for s in self.clean), dtype=np.int64, count=len(self.clean))
+    
+    def positions(self, reference: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Start/end (half-open) of every peptide's first match in the reference
+        Peptides that do not map get -1 for both. Computed once per reference.
+        """
+        if self._positions_reference != reference:
+            self.start, self.end = ReferenceIndex.for_reference(reference).locate(self.clean)
+            self._positions_reference = reference
+        return self.start, self.end
+    
+    def hits(self, reference: str, policy: str = 'first') -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Reference occurrences of every peptide under a multi-mapping policy
+        Returns (rows, starts, ends, weights), one entry per retained
+        occurrence; ``weights`` scale the peptide's intensity at that
+        occurrence. Computed once per reference and policy.
+        """
+        _check_multi_map_policy(policy)
+        key = (reference, policy)
+        if key not in self._hits_cache:
+            rows, starts, counts = ReferenceIndex.for_reference(reference).locate_all(self.clean)
+            hit_counts = counts[rows]
+            
+            if policy == 'first':
+                keep = np.ones(len(rows), dtype=bool)
+                keep[1:] = rows[1:] != rows[:-1]
+            elif policy == 'exclude':
+                keep = hit_counts == 1
+            else:
+                keep = np.ones(len(rows), dtype=bool)
+            
+            rows, starts, hit_counts = rows[keep], starts[keep], hit_counts[keep]
+            weights = 1.0 / hit_counts if policy == 'split' else np.ones(len(rows))
+            ends = starts + self.lengths[rows]
+            self._hits_cache[key] = (rows, starts, ends, weights)
+        
+        return self._hits_cache[key]
+    
+    def coverage(self, reference: str, policy: str = 'first') -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Position x sample intensity and count matrices (see positional_coverage)
+        Computed once per reference and policy and shared by every plot.
+        """
+        key = (reference, policy)
+        if key not in self._coverage_cache:
+            rows, starts, ends, weights = self.hits(reference, policy)
+            self._coverage_cache[key] = positional_coverage(
+                starts, ends, self.intensities[rows], len(reference), weights)
+        return self._coverage_cache[key]
+    
+    def flanking_residues(self, reference: str, window: int = 4) -> pd.DataFrame:
+        """
+        Reference residues around both cleavage sites of every peptide
+        Returns, per peptide, the N-terminal site's P1 residue
+        ('left_cleavage'), the C-terminal site's P1' residue
+        ('right_cleavage') and the P4-P4' context of each site ('n_context',
+        'c_context'; ``window`` residues either side, '-' past a terminus).
+        Leading/trailing ``(X)`` markers are part of the mapped sequence, so
+        the cleavage sites sit just inside them. Unmapped peptides get None.
+        """
+        starts, ends = self.positions(reference)
+        mapped = starts >= 0
+        original = pd.Series(self.original, dtype='string')
+        n_site = starts + original.str.startswith('(').fillna(False).to_numpy(dtype=bool)
+        c_site = ends - original.str.endswith(')').fillna(False).to_numpy(dtype=bool)
+        
+        # One gather per site over the padded reference
+        padded = np.array(['-'] * window + list(reference) + ['-'] * window)
+        offsets = np.arange(-window, window) + window
+        columns = {}
+        for side, site in (('n', n_site), ('c', c_site)):
+            context = padded[np.where(mapped, site, 0)[:, None] + offsets]
+            columns[side] = context
+            columns[f'{side}_context'] = np.where(
+                mapped, np.ascontiguousarray(context).view(f'<U{2 * window}').ravel(), None)
+        
+        def residue(context, column):
+            values = context[:, column].astype(object)
+            values[~mapped | (values == '-')] = None
+            return values
+        
+        return pd.DataFrame({
+            'left_cleavage': residue(columns['n'], window - 1),
+            'right_cleavage': residue(columns['c'], window),
+            'n_context': columns['n_context'],
+            'c_context': columns['c_context']
+        })
+    
+    def derive_cleavage_residues(self, reference: str, source: str = 'reference'):
+        """
+        Replace the notation cleavage residues with ones read from the reference
+        ``source`` 'reference' derives every peptide's residues; 'auto' only
+        those of peptides without any ``(X)`` notation.
+        """
+        if source not in ('reference', 'auto'):
+            raise ValueError(f"Unknown cleavage residue source {source!r}; expected 'reference' or 'auto'")
+        if not len(self):
+            return
+        flanks = self.flanking_residues(reference, window=1)
+        left = flanks['left_cleavage'].to_numpy(dtype=object)
+        right = flanks['right_cleavage'].to_numpy(dtype=object)
+        if source == 'auto':
+            original = pd.Series(self.original, dtype='string')
+            notated = original.str.contains(r'\([A-Z]\)', regex=True).fillna(False).to_numpy(dtype=bool)
+            left = np.where(notated, np.asarray(self.left_cleavage, dtype=object), left)
+            right = np.where(notated, np.asarray(self.right_cleavage, dtype=object), right)
+        self.left_cleavage = pd.Categorical(left)
+        self.right_cleavage = pd.Categorical(right)
+    
+    def residue_totals(self, side: str) -> Dict[str, float]:
+        """Total intensity per cleavage residue (``side`` is 'left' or 'right')"""
+        categorical = self.left_cleavage if side == 'left' else self.right_cleavage
+        codes = categorical.codes
+        has_residue = codes >= 0
+        totals = np.bincount(codes[has_residue], 
+                             weights=self.intensities[has_residue].sum(axis=1),
+                             minlength=len(categorical.categories))
+        
+        # Keep first-appearance order, as the dict-based grouping did
+        present, first_seen = np.unique(codes[has_residue], return_index=True)
+        order = present[np.argsort(first_seen)]
+        return {categorical.categories[c]: float(totals[c]) for c in order}
+    
+    def record(self, i: int) -> Dict:
+        """Dict view of one peptide, in the original ``sequences`` format"""
+        left = self.left_cleavage[i]
+        right = self.right_cleavage[i]
+        return {
+            'number': self.number[i],
+            'original': self.original[i],
+            'clean': self.clean[i],
+            'left_cleavage': left if isinstance(left, str) else None,
+            'right_cleavage': right if isinstance(right, str) else None,
+            'intensities': self.intensities[i].tolist()
+        }
+    
+    def to_records(self) -> List[Dict]:
+        return [self.record(i) for i in range(len(self))]
+    
+    def __len__(self) -> int:
+        return len(self.clean)
+    
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.record(i)
+    
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.record(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("peptide index out of range")
+        return self.record(i)
+
+
+def _as_peptide_table(sequences) -> PeptideTable:
+    """Accept either a PeptideTable or a list of sequence dicts"""
+    if isinstance(sequences, PeptideTable):
+        return sequences
+    return PeptideTable.from_records(list(sequences))
+
+
+def positional_coverage(starts: np.ndarray,
+                        ends: np.ndarray,
+                        intensities: np.ndarray,
+                        length: int,
+                        weights: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Position x sample intensity and count matrices for a set of peptides
+    
+    Peptide i covers reference positions [starts[i], ends[i]) with intensity
+    row ``intensities[i]`` (scaled by ``weights[i]``). Only positive
+    intensities contribute; counts are the number of contributing peptides
+    at each position. Built from difference arrays and a cumulative sum, so
+    the cost is O(peptides + positions) per sample.
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    positive = np.clip(np.asarray(intensities, dtype=float), 0, None)
+    weighted = positive * weights[:, None] if weights is not None else positive
+    
+    num_samples = positive.shape[1]
+    coverage = np.zeros((length, num_samples))
+    counts = np.zeros((length, num_samples), dtype=np.int64)
+    for sample in range(num_samples):
+        contributes = positive[:, sample] > 0
+        s, e = starts[contributes], ends[contributes]
+        values = weighted[contributes, sample]
+        
+        diff = np.bincount(s, weights=values, minlength=length + 1) - np.bincount(e, weights=values, minlength=length + 1)
+        count_diff = np.bincount(s, minlength=length + 1) - np.bincount(e, minlength=length + 1)
+        coverage[:, sample] = np.cumsum(diff)[:length]
+        counts[:, sample] = np.cumsum(count_diff)[:length]
+    
+    # Cancelled sums leave rounding residue; uncovered positions are exactly zero
+    coverage[counts == 0] = 0.0
+    return coverage, counts
+
+
+BIN_REDUCTIONS = ('max', 'mean', 'sum')
+
+
+def _check_bin_options(bin_size, reduce: str, allow_auto: bool = False) -> None:
+    if reduce not in BIN_REDUCTIONS:
+        raise ValueError(f"reduce must be one of {BIN_REDUCTIONS}, got {reduce!r}")
+    if bin_size is None or (allow_auto and bin_size == 'auto'):
+        return
+    if not isinstance(bin_size, (int, np.integer)) or isinstance(bin_size, bool) or bin_size < 1:
+        raise ValueError(f"bin_size must be an integer of at least 1, got {bin_size!r}")
+
+def bin_positions(matrix: np.ndarray, bin_size: int, reduce: str = 'max') -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Aggregate consecutive rows of a position x sample matrix into bins
+    
+    Returns the binned matrix and the first position of each bin. The last
+    bin may be shorter; 'mean' divides by its actual width.
+    """
+    _check_bin_options(bin_size, reduce)
+    
+    starts = np.arange(0, len(matrix), bin_size)
+    if len(starts) == 0:
+        return matrix[:0].astype(float), starts
+    if reduce == 'max':
+        return np.maximum.reduceat(matrix, starts, axis=0).astype(float), starts
+    binned = np.add.reduceat(matrix, starts, axis=0).astype(float)
+    if reduce == 'mean':
+        binned /= np.diff(np.append(starts, len(matrix)))[:, None]
+    return binned, starts
+
+
+def _categorical_strings(categorical: pd.Categorical) -> np.ndarray:
+    """Categorical as a plain string array, with '' for missing values"""
+    values = np.asarray(categorical.astype(object), dtype=object)
+    values[categorical.codes < 0] = ''
+    return values.astype(str)
+
+
+_MARKER = r'\(([A-Z])\)'
+_ANY_MARKER = r'\([A-Z-]\)'  # includes the (-) protein terminus
+
+def parse_cleavage_notation(sequences) -> pd.DataFrame:
+    """
+    Parse ``(X)`` cleavage notation for a whole sequence column at once
+    
+    Returns one row per sequence with the clean sequence (parentheses
+    removed), the first and second marker residues as left/right cleavage,
+    the number of markers and a ``valid`` flag. ``(-)`` marks a protein
+    terminus and counts as a marker without a residue. A notation is invalid
+    when it has more than two markers or parentheses that do not form a
+    marker; its first two residue markers are still used.
+    """
+    sequences = pd.Series(sequences, dtype='string').reset_index(drop=True)
+    markers = sequences.str.extract(_MARKER + r'(?:.*?' + _MARKER + r')?')
+    marker_count = sequences.str.count(_ANY_MARKER).fillna(0).astype(int)
+    stray = sequences.str.replace(_ANY_MARKER, '', regex=True).str.contains(r'[()]', regex=True)
+    
+    return pd.DataFrame({
+        'clean': sequences.str.replace(r'[()]', '', regex=True).to_numpy(dtype=object, na_value=None),
+        'left_cleavage': markers[0].to_numpy(dtype=object, na_value=None),
+        'right_cleavage': markers[1].to_numpy(dtype=object, na_value=None),
+        'markers': marker_count.to_numpy(),
+        'valid': ((marker_count <= 2) & ~stray.fillna(False).astype(bool)).to_numpy()
+    })
+
+def _report_notation(source: str, notation: pd.DataFrame, numbers) -> None:
+    """Print the peptides whose cleavage notation is malformed"""
+    invalid = ~notation['valid'].to_numpy()
+    if not invalid.any():
+        return
+    too_many = invalid & (notation['markers'].to_numpy() > 2)
+    for mask, problem in ((too_many, "more than two cleavage markers (first two used)"),
+                          (invalid & ~too_many, "malformed cleavage notation")):
+        if mask.any():
+            listed = ', '.join(str(n) for n in np.asarray(numbers, dtype=object)[mask][:10])
+            more = ', ...' if mask.sum() > 10 else ''
+            print(f"⚠ {source}: {int(mask.sum())} peptide(s) with {problem}: #{listed}{more}")
+
+
+class ParseDiskCache:
+    """
+    Persistent cache of parsed worksheets
+    Each entry is a compressed .npz file keyed by workbook content hash,
+    sheet name and parser settings. Least recently used entries are evicted
+    once the cache directory grows past ``max_bytes``.
+    """
+    
+    FORMAT_VERSION = 2
+    
+    def __init__(self, cache_dir: str, max_bytes: int = 256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    @staticmethod
+    def file_hash(path: str) -> str:
+        """SHA-256 of a file's content"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def key(self, content_hash: str, sheet_name: str, settings: Dict) -> str:
+        """Cache key for one sheet of one workbook under the given parser settings"""
+        # Reader options may hold types or callables (e.g. dtype=, converters=); repr
+        # keeps them in the key, at worst costing a miss when the repr has an address
+        payload = json.dumps([self.FORMAT_VERSION, content_hash, sheet_name, settings], sort_keys=True, default=repr)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npz")
+    
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the cached parse for ``key``, or None on a miss"""
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                numbers = [None if np.isnan(n) else (int(n) if n.is_integer() else n)
+                           for n in data['number'].tolist()]
+                table = PeptideTable(
+                    numbers,
+                    data['original'].tolist(),
+                    data['clean'].tolist(),
+                    [r or None for r in data['left_cleavage'].tolist()],
+                    [r or None for r in data['right_cleavage'].tolist()],
+                    data['intensities']
+                )
+                reference = str(data['reference'])
+        except (OSError, KeyError, ValueError):
+            return None
+        
+        # Mark as recently used for LRU eviction; another process may have
+        # evicted the entry since it was read
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return {'reference': reference, 'sequences': table}
+    
+    def put(self, key: str, raw_data: Dict):
+        """Store a parse result; silently skips data that is not cacheable"""
+        table = _as_peptide_table(raw_data['sequences'])
+        try:
+            numbers = np.array([np.nan if n is None else n for n in table.number], dtype=float)
+        except (TypeError, ValueError):
+            return
+        
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez_compressed(
+                    f,
+                    reference=np.array(str(raw_data['reference'])),
+                    number=numbers,
+                    original=table.original.astype(str),
+                    clean=table.clean.astype(str),
+                    left_cleavage=_categorical_strings(table.left_cleavage),
+                    right_cleavage=_categorical_strings(table.right_cleavage),
+                    intensities=table.intensities
+                )
+            os.replace(tmp_path, path)
+        except BaseException:
+            # Leave no partial file behind (e.g. when the disk is full)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        self._evict()
+    
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.npz'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue  # removed by another process sharing the directory
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+    
+    def _evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+    
+    def clear(self):
+        """Delete every cached entry"""
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+# OLE2 compound document signature of legacy .xls workbooks
+_XLS_SIGNATURE = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+
+def is_legacy_xls(path: str) -> bool:
+    """True for legacy Excel 97-2003 workbooks, whatever the file extension"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(_XLS_SIGNATURE)) == _XLS_SIGNATURE
+    except OSError:
+        return str(path).lower().endswith('.xls')
+
+
+class XlsSheet:
+    """
+    Read-only view of one sheet of a legacy .xls workbook
+    Rows come out like openpyxl's ``iter_rows(values_only=True)``: empty
+    cells are None and whole numbers are ints.
+    """
+    
+    def __init__(self, book, sheet):
+        self._book = book
+        self._sheet = sheet
+        self.title = sheet.name
+    
+    def _value(self, cell):
+        import xlrd
+        if cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK, xlrd.XL_CELL_ERROR):
+            return None
+        if cell.ctype == xlrd.XL_CELL_NUMBER:
+            return int(cell.value) if cell.value.is_integer() else cell.value
+        if cell.ctype == xlrd.XL_CELL_BOOLEAN:
+            return bool(cell.value)
+        if cell.ctype == xlrd.XL_CELL_DATE:
+            return xlrd.xldate_as_datetime(cell.value, self._book.datemode)
+        return cell.value
+    
+    def iter_rows(self, 
+                  min_row: int = 1, 
+                  max_row: Optional[int] = None,
+                  min_col: int = 1,
+                  max_col: Optional[int] = None, 
+                  values_only: bool = True):
+        """Yield row value tuples (1-based bounds), padded to ``max_col`` columns"""
+        sheet = self._sheet
+        last_col = max_col if max_col is not None else sheet.ncols
+        last_row = min(max_row, sheet.nrows) if max_row is not None else sheet.nrows
+        for r in range(min_row - 1, last_row):
+            cells = sheet.row_slice(r, min_col - 1, max(min_col - 1, min(last_col, sheet.row_len(r))))
+            values = [self._value(cell) for cell in cells]
+            values.extend([None] * (last_col - min_col + 1 - len(values)))
+            yield tuple(values)
+
+
+class XlsWorkbook:
+    """
+    Read-only legacy .xls workbook with the openpyxl read-only interface the
+    mapper uses (``sheetnames``, ``wb[name]``, ``close``)
+    Sheets are loaded on demand, so only the worksheets that are processed
+    are ever decoded.
+    """
+    
+    def __init__(self, path: str):
+        try:
+            import xlrd
+        except ImportError as e:
+            raise ImportError("Reading .xls workbooks requires xlrd (pip install xlrd)") from e
+        self._book = xlrd.open_workbook(path, on_demand=True)
+        self.sheetnames = self._book.sheet_names()
+    
+    def __getitem__(self, name: str) -> XlsSheet:
+        if name not in self.sheetnames:
+            raise KeyError(f"Worksheet {name} does not exist.")
+        return XlsSheet(self._book, self._book.sheet_by_name(name))
+    
+    def close(self):
+        self._book.release_resources()
+
+
+# ============================================================================
+# TABLE INPUT ADAPTERS
+# ============================================================================
+
+def _read_parquet(path: str, **kwargs) -> pd.DataFrame:
+    try:
+        return pd.read_parquet(path, **kwargs)
+    except ImportError as e:
+        raise ImportError("Reading Parquet files requires pyarrow (pip install pyarrow)") from e
+
+# File suffix -> reader returning a DataFrame with one row per peptide
+INPUT_ADAPTERS: Dict[str, Callable[..., pd.DataFrame]] = {
+    '.csv': lambda path, **kwargs: pd.read_csv(path, **kwargs),
+    '.tsv': lambda path, **kwargs: pd.read_csv(path, sep='\t', **kwargs),
+    '.tab': lambda path, **kwargs: pd.read_csv(path, sep='\t', **kwargs),
+    '.parquet': _read_parquet,
+    '.pq': _read_parquet,
+}
+
+def register_input_adapter(suffix: str, reader: Callable[..., pd.DataFrame]):
+    """Register a reader for peptide tables stored in files ending in ``suffix``"""
+    INPUT_ADAPTERS[suffix.lower()] = reader
+
+def input_adapter_for(path: str) -> Optional[Callable[..., pd.DataFrame]]:
+    """Reader registered for the file's suffix, or None for workbooks"""
+    return INPUT_ADAPTERS.get(os.path.splitext(str(path))[1].lower())
+
+def read_peptide_table(source, 
+                       reference: Optional[str] = None,
+                       sequence_column: str = 'Sequence',
+                       intensity_columns: Optional[List[str]] = None,
+                       number_column: Optional[str] = None,
+                       reference_column: Optional[str] = None,
+                       **reader_kwargs) -> Dict:
+    """
+    Parse a flat peptide table (CSV, TSV, Parquet or a DataFrame) into the
+    structure returned by ``parse_raw_worksheet``
+    
+    Args:
+        source: Path to a file with a registered input adapter, or a DataFrame
+        reference: Reference sequence (overrides ``reference_column``)
+        sequence_column: Column holding peptide sequences, with or without
+            ``(X)`` cleavage notation
+        intensity_columns: Sample intensity columns, in order (defaults to
+            every numeric column other than ``number_column``)
+        number_column: Peptide number column (defaults to the 1-based row)
+        reference_column: Column whose first non-empty value is the reference
+        **reader_kwargs: Passed to the input adapter (e.g. ``sep``, ``columns``)
+    """
+    if isinstance(source, pd.DataFrame):
+        frame = source
+    else:
+        reader = input_adapter_for(source)
+        if reader is None:
+            raise ValueError(f"No input adapter registered for {source}")
+        frame = reader(source, **reader_kwargs)
+    
+    if reference is None and reference_column is not None:
+        values = frame[reference_column].dropna()
+        reference = str(values.iloc[0]) if len(values) else None
+    if not reference:
+        raise ValueError("No reference sequence given (pass reference or reference_column)")
+    
+    if intensity_columns is None:
+        excluded = {sequence_column, number_column, reference_column}
+        intensity_columns = [c for c in frame.select_dtypes('number').columns if c not in excluded]
+    
+    intensities = frame[list(intensity_columns)].apply(pd.to_numeric, errors='coerce').fillna(0).to_numpy(dtype=float)
+    sequences = frame[sequence_column].astype('string')
+    
+    # Same filter as the worksheet parser: a sequence and at least one positive intensity
+    keep = (sequences.fillna('') != '').to_numpy(dtype=bool) & (intensities > 0).any(axis=1)
+    sequences = sequences[keep]
+    if number_column is not None:
+        numbers = frame[number_column].to_numpy(dtype=object)[keep]
+    else:
+        numbers = np.arange(1, len(frame) + 1)[keep]
+    
+    notation = parse_cleavage_notation(sequences)
+    _report_notation(str(source) if not isinstance(source, pd.DataFrame) else 'table', notation, numbers)
+    
+    return {
+        'reference': reference,
+        'sequences': PeptideTable(
+            numbers,
+            sequences.to_numpy(dtype=object),
+            notation['clean'],
+            notation['left_cleavage'],
+            notation['right_cleavage'],
+            intensities[keep]
+        )
+    }
+
+
+# Samples per sheet when the header row does not name any
+DEFAULT_NUM_SAMPLES = 7
+
+# Heatmap renderers:
+#   seaborn - sns.heatmap with one tick label per row
+#   fast    - a single image on a headless Agg canvas with decimated tick labels
+#   auto    - fast once a heatmap has more than FAST_HEATMAP_ROWS rows
+HEATMAP_RENDERERS = ('seaborn', 'fast', 'auto')
+FAST_HEATMAP_ROWS = 1000
+
+class PanelLayout:
+    """
+    Column layout of a processed worksheet for ``num_samples`` samples
+    Left panel (#, sequence, intensities from column C), two spacer columns,
+    the cleavage residue and the four summary columns (left, right, sum,
+    percentage), then the right panel one column further on. With seven
+    samples this is the original C:I / M:P / T:Z layout.
+    """
+    
+    def __init__(self, num_samples: int = DEFAULT_NUM_SAMPLES):
+        self.num_samples = num_samples
+        self.left_number_col = 1
+        self.left_sequence_col = 2
+        self.left_intensity_col = 3
+        self.residue_col = self.left_intensity_col + num_samples + 2
+        self.summary_col = self.residue_col + 1
+        self.right_number_col = self.residue_col + 6
+        self.right_sequence_col = self.right_number_col + 1
+        self.right_intensity_col = self.right_sequence_col + 1
+        # Formula block written next to computed summary values
+        self.formula_block_col = self.right_intensity_col + num_samples + 1
+    
+    def _range(self, first_col: int, start_row: int, end_row: int) -> str:
+        last_col = first_col + self.num_samples - 1
+        return f"{get_column_letter(first_col)}{start_row}:{get_column_letter(last_col)}{end_row}"
+    
+    def left_range(self, start_row: int, end_row: int) -> str:
+        """Left panel intensity range for the given rows, e.g. 'C3:I14'"""
+        return self._range(self.left_intensity_col, start_row, end_row)
+    
+    def right_range(self, start_row: int, end_row: int) -> str:
+        """Right panel intensity range for the given rows, e.g. 'T6:Z86'"""
+        return self._range(self.right_intensity_col, start_row, end_row)
+
+
 class AdvancedCleavageMapper:
     """
     Complete automation for peptide cleavage mapping analysis
     Handles both N-terminal (left) and C-terminal (right) grouping with formula linkage
     """
     
-    def __init__(self, workbook_path: str):
-        self.wb = openpyxl.load_workbook(workbook_path)
+    def __init__(self, 
+                 workbook_path: str, 
+                 streaming: bool = False, 
+                 lazy: bool = False,
+                 cache_dir: Optional[str] = None,
+                 cache_max_bytes: int = 256 * 1024 * 1024,
+                 multi_map_policy: str = 'first',
+                 output_mode: str = 'workbook',
+                 summary_values: str = 'formulas',
+                 table_options: Optional[Dict] = None,
+                 cleavage_residues: str = 'notation',
+                 num_samples: Optional[int] = None):
+        """
+        Args:
+            workbook_path: Path to the input workbook
+            streaming: Parse raw worksheets from a read-only workbook, one
+                row at a time, instead of the fully loaded one
+            lazy: Defer loading the full workbook until it is first needed
+                (e.g. to write a processed sheet); until then sheets are only
+                read on demand through the read-only workbook
+            cache_dir: Directory for the persistent parse cache (disabled if None)
+            cache_max_bytes: Size limit of the parse cache before LRU eviction
+            multi_map_policy: How peptides matching the reference more than
+                once are attributed ('first', 'split', 'all' or 'exclude')
+            output_mode: 'workbook' saves the input workbook plus the generated
+                sheets; 'processed' streams only the generated sheets into a
+                fresh write-only workbook (constant memory, input left unloaded)
+            summary_values: How the group sums, totals and percentages are
+                written: 'formulas' (Excel formulas only), 'values' (computed
+                numbers, readable without recalculation) or 'both' (numbers in
+                the summary columns plus the equivalent formulas in a block to
+                the right of the right panel)
+            table_options: Column mapping for peptide-table inputs (CSV, TSV,
+                Parquet), passed to ``read_peptide_table``
+            cleavage_residues: Where the left/right cleavage residues come
+                from: 'notation' (the ``(X)`` markers), 'reference' (P1/P1'
+                read from the reference at each mapped peptide's cleavage
+                sites) or 'auto' (notation where present, else reference)
+            num_samples: Number of intensity columns from column C; None
+                detects it per sheet from the contiguous header labels in row 1
+        
+        Legacy .xls workbooks are read directly, decoding only the sheets
+        that are parsed. A peptide table is exposed as a single sheet named
+        after the file. Neither can be rewritten, so the saved workbook then
+        holds only the generated sheets.
+        """
+        if output_mode not in ('workbook', 'processed'):
+            raise ValueError(f"Unknown output mode {output_mode!r}; expected 'workbook' or 'processed'")
+        if summary_values not in ('formulas', 'values', 'both'):
+            raise ValueError(f"Unknown summary mode {summary_values!r}; expected 'formulas', 'values' or 'both'")
+        if cleavage_residues not in ('notation', 'reference', 'auto'):
+            raise ValueError(f"Unknown cleavage residue source {cleavage_residues!r}; "
+                             "expected 'notation', 'reference' or 'auto'")
+        
+        self.workbook_path = workbook_path
+        self.streaming = streaming
+        self.lazy = lazy
+        self.multi_map_policy = _check_multi_map_policy(multi_map_policy)
+        self.output_mode = output_mode
+        self.summary_values = summary_values
+        self.cleavage_residues = cleavage_residues
+        self._wb = None
+        self._output_wb = None
+        self._read_only_wb = None
+        self._parse_cache: Dict[str, Dict] = {}
+        self._modified_sheets = set()
+        self._content_hash = None
+        self.disk_cache = ParseDiskCache(cache_dir, cache_max_bytes) if cache_dir else None
+        self.table_input = input_adapter_for(workbook_path) is not None
+        self.table_options = dict(table_options or {})
+        self.table_sheet_name = os.path.splitext(os.path.basename(workbook_path))[0]
+        self.legacy_xls = not self.table_input and is_legacy_xls(workbook_path)
+        if not lazy and output_mode == 'workbook' and not (self.legacy_xls or self.table_input):
+            self._wb = openpyxl.load_workbook(workbook_path)
         self.intensity_start_col = 3  # Column C
-        self.intensity_end_col = 9     # Column I
-        self.num_samples = 7
-        
-    def analyze_sequence_structure(self, sequences: List[Dict], reference: str) -> Dict:
+        self.num_samples = num_samples
+    
+    @property
+    def wb(self):
+        """Full, editable workbook (loaded on first access in lazy mode)"""
+        if self._wb is None:
+            if self.legacy_xls or self.table_input:
+                # Generated sheets go to a new workbook; raw data stays in the input
+                self._wb = openpyxl.Workbook()
+                self._wb.remove(self._wb.active)
+            else:
+                self._wb = openpyxl.load_workbook(self.workbook_path)
+        return self._wb
+    
+    @property
+    def sheetnames(self) -> List[str]:
+        """Worksheet names, without materializing any sheet in lazy mode"""
+        if self.legacy_xls or self.table_input:
+            # Raw sheets live in the input file, generated ones in the new workbook
+            names = [self.table_sheet_name] if self.table_input else list(self._open_read_only().sheetnames)
+            if self._wb is not None:
+                names += [name for name in self._wb.sheetnames if name not in names]
+            return names
+        if self._wb is not None:
+            return self._wb.sheetnames
+        return self._open_read_only().sheetnames
+    
+    def _open_read_only(self):
+        """Open (once) a read-only view of the input workbook for on-demand parses"""
+        if self._read_only_wb is None:
+            if self.legacy_xls:
+                self._read_only_wb = XlsWorkbook(self.workbook_path)
+            else:
+                self._read_only_wb = openpyxl.load_workbook(self.workbook_path, read_only=True)
+        return self._read_only_wb
+    
+    def invalidate_parse_cache(self, sheet_name: Optional[str] = None):
+        """
+        Drop memoized parse results for one worksheet (or all worksheets)
+        Call this after editing a raw sheet in ``self.wb`` directly. The
+        sheets are also kept out of the disk cache from then on, since its
+        entries describe the file on disk rather than the edited workbook.
+        """
+        if sheet_name is None:
+            self._parse_cache.clear()
+            if self._wb is not None:
+                self._modified_sheets.update(self._wb.sheetnames)
+        else:
+            self._parse_cache.pop(sheet_name, None)
+            self._modified_sheets.add(sheet_name)
+    
+    def _parser_settings(self) -> Dict:
+        """Settings that change the result of parse_raw_worksheet"""
+        if self.table_input:
+            settings = {'table_options': self.table_options}
+        else:
+            settings = {
+                'intensity_start_col': self.intensity_start_col,
+                'num_samples': self.num_samples
+            }
+        if self.cleavage_residues != 'notation':
+            settings['cleavage_residues'] = self.cleavage_residues
+        return settings
+    
+    def _disk_cache_key(self, sheet_name: str) -> Optional[str]:
+        """Disk cache key for a raw sheet, or None if the sheet must not be cached"""
+        if self.disk_cache is None or sheet_name in self._modified_sheets:
+            return None
+        if self._content_hash is None:
+            self._content_hash = ParseDiskCache.file_hash(self.workbook_path)
+        return self.disk_cache.key(self._content_hash, sheet_name, self._parser_settings())
+    
+    def close(self):
+        """Release the read-only workbook handle used by on-demand parses"""
+        if self._read_only_wb is not None:
+            self._read_only_wb.close()
+            self._read_only_wb = None
+    
+    def __getstate__(self):
+        """
+        Picklable copy for worker processes: settings only, without open
+        workbooks or memoized parses
+        """
+        state = self.__dict__.copy()
+        state.update(_wb=None, _output_wb=None, _read_only_wb=None, _parse_cache={}, _modified_sheets=set())
+        return state
+        
+    @staticmethod
+    def _sample_labels(num_samples: int, sample_labels: Optional[List[str]] = None) -> List[str]:
+        """One label per sample: the given labels, trimmed or filled in with Sample_i"""
+        labels = list(sample_labels or [])[:num_samples]
+        return labels + [f'Sample_{i}' for i in range(len(labels) + 1, num_samples + 1)]
+    
+    def analyze_sequence_structure(self, sequences, reference: str, multi_map_policy: Optional[str] = None) -> Dict:
         """
         Analyze sequences to determine truncation patterns
         Returns mapping of sequences to their truncation positions
+        
+        ``sequences`` may be a PeptideTable or a list of sequence dicts; the
+        dicts placed in the groups are also returned under 'sequences'. Each
+        dict gets the first retained N/C-terminal position plus the lists of
+        all positions kept by the multi-mapping policy.
         """
+        policy = multi_map_policy or self.multi_map_policy
+        table = _as_peptide_table(sequences)
+        records = table.to_records() if isinstance(sequences, PeptideTable) else sequences
+        
+        rows, starts, ends, _ = table.hits(reference, policy)
+        n_positions = [[] for _ in range(len(table))]
+        c_positions = [[] for _ in range(len(table))]
+        for row, start, end in zip(rows.tolist(), starts.tolist(), ends.tolist()):
+            n_positions[row].append(start)
+            c_positions[row].append(end)
+        
         analysis = {
             'n_terminal_groups': defaultdict(list),
             'c_terminal_groups': defaultdict(list),
-            'sequence_mapping': {}
+            'sequence_mapping': {},
+            'sequences': records
         }
         
-        for seq_data in sequences:
-            clean = seq_data['clean']
-            
-            # Determine N-terminal truncation position
-            if clean in reference:
-                n_term_pos = reference.index(clean)
-            else:
-                n_term_pos = None
-            
-            # Determine C-terminal truncation position
-            if clean in reference:
-                c_term_pos = reference.index(clean) + len(clean)
-            else:
-                c_term_pos = None
-            
-            seq_data['n_term_position'] = n_term_pos
-            seq_data['c_term_position'] = c_term_pos
+        for seq_data, n_terms, c_terms in zip(records, n_positions, c_positions):
+            # N-terminal and C-terminal truncation positions
+            seq_data['n_term_position'] = n_terms[0] if n_terms else None
+            seq_data['c_term_position'] = c_terms[0] if c_terms else None
+            seq_data['n_term_positions'] = n_terms
+            seq_data['c_term_positions'] = c_terms
             
             # Group by cleavage residue
             if seq_data['left_cleavage']:
@@ -139,21 +1100,25 @@ class AdvancedCleavageMapper:
         Determine which right panel rows correspond to each left panel group
         Returns mapping: left_row -> (right_start_row, right_end_row)
         """
+        # Index the right panel once: sequence -> (first row, last row)
+        right_bounds = {}
+        for right_group in right_structure:
+            for seq_row in right_group['sequences']:
+                clean = seq_row['data']['clean']
+                row = seq_row['row']
+                bounds = right_bounds.get(clean)
+                right_bounds[clean] = (min(bounds[0], row), max(bounds[1], row)) if bounds else (row, row)
+        
         linkage = {}
         
         for left_group in left_structure:
-            # Extract sequences in this left group
-            left_seqs = [s['data']['clean'] for s in left_group['sequences']]
-            
             # Find matching sequences in right panel
-            matching_right_rows = []
-            for right_group in right_structure:
-                for seq_row in right_group['sequences']:
-                    if seq_row['data']['clean'] in left_seqs:
-                        matching_right_rows.append(seq_row['row'])
+            matching = [right_bounds[clean] 
+                        for clean in {s['data']['clean'] for s in left_group['sequences']} 
+                        if clean in right_bounds]
             
-            if matching_right_rows:
-                linkage[left_group['start_row']] = (min(matching_right_rows), max(matching_right_rows))
+            if matching:
+                linkage[left_group['start_row']] = (min(b[0] for b in matching), max(b[1] for b in matching))
         
         return linkage
     
@@ -164,167 +1129,388 @@ class AdvancedCleavageMapper:
         """
         Generate complete processed worksheet with all formulas
         """
-        sequences = raw_data['sequences']
+        rows = self.build_processed_rows(raw_data, sample_labels)
+        return self.write_processed_rows(output_sheet_name, rows)
+    
+    def build_processed_rows(self, raw_data: Dict, sample_labels: Optional[List[str]] = None) -> List[List]:
+        """
+        Assemble the processed worksheet (values and formulas) as whole rows
+        Returns one list of cell values per worksheet row, starting at row 1,
+        with None for empty cells.
+        """
         reference = raw_data['reference']
         
         # Analyze structure
-        analysis = self.analyze_sequence_structure(sequences, reference)
+        analysis = self.analyze_sequence_structure(raw_data['sequences'], reference)
         
         # Build panel structures
         left_structure = self.build_left_panel_structure(analysis['n_terminal_groups'])
-        right_structure = self.build_right_panel_structure(analysis['c_terminal_groups'], sequences)
+        right_structure = self.build_right_panel_structure(analysis['c_terminal_groups'], analysis['sequences'])
         
         # Determine linkage
         linkage = self.generate_panel_linkage(left_structure, right_structure)
         
-        # Create/clear worksheet
-        if output_sheet_name in self.wb.sheetnames:
-            ws = self.wb[output_sheet_name]
-            for row in ws.iter_rows():
-                for cell in row:
-                    cell.value = None
-        else:
-            ws = self.wb.create_sheet(output_sheet_name)
+        layout = PanelLayout(_as_peptide_table(raw_data['sequences']).num_samples)
+        
+        # Sparse grid: row -> {column: value}; later writes win, as with cell assignment
+        grid = defaultdict(dict)
         
-        # Write headers
-        self._write_complete_headers(ws, sample_labels)
+        # Headers
+        grid[1].update(self._header_cells(sample_labels, layout))
         
-        # Write left panel data
+        # Left panel data
         for group in left_structure:
             for seq_row in group['sequences']:
-                row = seq_row['row']
+                cells = grid[seq_row['row']]
                 data = seq_row['data']
                 
-                ws.cell(row, 1).value = data['number']  # Number
-                ws.cell(row, 2).value = data['clean']   # Sequence
+                cells[layout.left_number_col] = data['number']  # Number
+                cells[layout.left_sequence_col] = data['clean']   # Sequence
                 
                 # Intensity values
                 for i, intensity in enumerate(data['intensities']):
-                    ws.cell(row, 3 + i).value = intensity
+                    cells[layout.left_intensity_col + i] = intensity
                 
-                ws.cell(row, 12).value = group['residue']  # Left cleavage indicator
+                cells[layout.residue_col] = group['residue']  # Left cleavage indicator
         
-        # Write right panel data
+        # Right panel data
         for group in right_structure:
             for seq_row in group['sequences']:
-                row = seq_row['row']
+                cells = grid[seq_row['row']]
                 data = seq_row['data']
                 
-                ws.cell(row, 19).value = data['clean']  # Sequence in right panel
+                cells[layout.right_sequence_col] = data['clean']  # Sequence in right panel
                 
                 # Intensity values
                 for i, intensity in enumerate(data['intensities']):
-                    ws.cell(row, 20 + i).value = intensity
+                    cells[layout.right_intensity_col + i] = intensity
+        
+        # Summary formulas and/or computed values
+        if self.summary_values in ('formulas', 'both'):
+            formula_col = layout.summary_col if self.summary_values == 'formulas' else layout.formula_block_col
+            for row, cells in self._formula_cells(left_structure, right_structure, linkage, 
+                                                  formula_col, layout).items():
+                grid[row].update(cells)
+        if self.summary_values in ('values', 'both'):
+            for row, cells in self._summary_value_cells(left_structure, right_structure, linkage, layout).items():
+                grid[row].update(cells)
+        
+        rows = []
+        for row in range(1, max(grid) + 1):
+            cells = grid.get(row)
+            rows.append([cells.get(col) for col in range(1, max(cells) + 1)] if cells else [])
+        return rows
+    
+    def write_processed_rows(self, output_sheet_name: str, rows: List[List]):
+        """
+        Write rows from build_processed_rows to a worksheet in one ordered pass
+        """
+        if self.output_mode == 'processed':
+            return self._stream_processed_rows(output_sheet_name, rows)
+        
+        # Create/clear worksheet
+        self.invalidate_parse_cache(output_sheet_name)
+        if output_sheet_name in self.wb.sheetnames:
+            # Replace the old sheet at the same position instead of clearing it
+            # cell by cell, so stale cells, dimensions and styles go with it
+            old_ws = self.wb[output_sheet_name]
+            index = self.wb.index(old_ws)
+            self.wb.remove(old_ws)
+            ws = self.wb.create_sheet(output_sheet_name, index)
+        else:
+            ws = self.wb.create_sheet(output_sheet_name)
         
-        # Add formulas
-        self._write_formulas(ws, left_structure, right_structure, linkage)
+        for values in rows:
+            ws.append({col_idx: value for col_idx, value in enumerate(values, 1) if value is not None})
         
         return ws
     
-    def _write_complete_headers(self, ws, sample_labels: Optional[List[str]] = None):
-        """Write comprehensive headers for both panels"""
-        if sample_labels is None:
-            sample_labels = [f'Sample_{i}' for i in range(1, 8)]
+    def _stream_processed_rows(self, output_sheet_name: str, rows: List[List]):
+        """Append rows to a new sheet of the write-only output workbook"""
+        if self._output_wb is None:
+            self._output_wb = openpyxl.Workbook(write_only=True)
+        if output_sheet_name in self._output_wb.sheetnames:
+            raise ValueError(f"Sheet '{output_sheet_name}' was already written; "
+                             "write-only output sheets cannot be regenerated")
+        
+        ws = self._output_wb.create_sheet(output_sheet_name)
+        for values in rows:
+            ws.append(values)
+        return ws
+    
+    def _header_cells(self, 
+                      sample_labels: Optional[List[str]] = None, 
+                      layout: Optional[PanelLayout] = None) -> Dict[int, str]:
+        """Comprehensive headers for both panels, as column -> value"""
+        layout = layout or PanelLayout()
+        sample_labels = self._sample_labels(layout.num_samples, sample_labels)
+        
+        cells = {}
         
         # Left panel
-        ws.cell(1, 1).value = '#'
-        ws.cell(1, 2).value = 'Sequence'
+        cells[layout.left_number_col] = '#'
+        cells[layout.left_sequence_col] = 'Sequence'
         for i, label in enumerate(sample_labels):
-            ws.cell(1, 3 + i).value = label
+            cells[layout.left_intensity_col + i] = label
         
         # Calculation columns
-        ws.cell(1, 12).value = 'left'
-        ws.cell(1, 13).value = 'right'
-        ws.cell(1, 14).value = 'sum'
-        ws.cell(1, 15).value = 'percentage'
+        for i, label in enumerate(['left', 'right', 'sum', 'percentage']):
+            cells[layout.residue_col + i] = label
         
         # Right panel
-        ws.cell(1, 18).value = '#'
-        ws.cell(1, 19).value = 'Sequence'
+        cells[layout.right_number_col] = '#'
+        cells[layout.right_sequence_col] = 'Sequence'
         for i, label in enumerate(sample_labels):
-            ws.cell(1, 20 + i).value = label
+            cells[layout.right_intensity_col + i] = label
+        
+        # Formula block alongside computed values
+        if self.summary_values == 'both':
+            for i, label in enumerate(['left formula', 'right formula', 'sum formula', 'percentage formula']):
+                cells[layout.formula_block_col + i] = label
+        
+        return cells
     
-    def _write_formulas(self, ws, left_structure: List[Dict], right_structure: List[Dict], linkage: Dict):
+    def _formula_cells(self, 
+                       left_structure: List[Dict], 
+                       right_structure: List[Dict], 
+                       linkage: Dict,
+                       first_col: Optional[int] = None,
+                       layout: Optional[PanelLayout] = None) -> Dict[int, Dict[int, object]]:
         """
-        Write all calculation formulas
+        All calculation formulas, as row -> {column: value}
+        The four summary columns (left, right, total, percentage) start at
+        ``first_col`` (the layout's summary column, M for 7 samples, by default).
         """
+        cells = defaultdict(dict)
+        if not left_structure:
+            return cells
+        
+        layout = layout or PanelLayout()
+        if first_col is None:
+            first_col = layout.summary_col
+        
+        left_col, right_col, total_col, pct_col = range(first_col, first_col + 4)
+        m, n, o = (get_column_letter(c) for c in (left_col, right_col, total_col))
+        
         # Determine total row (last group's end + 1)
         total_row = max(g['end_row'] for g in left_structure) + 1
         
-        # Write formulas for each left panel group
+        # Formulas for each left panel group
         for group in left_structure:
             summary_row = group['end_row'] + 1  # Row after group for summary
             start = group['start_row']
             end = group['end_row']
             
             # Column M: Sum of left panel intensities
-            ws.cell(summary_row, 13).value = f"=SUM(C{start}:I{end})"
+            cells[summary_row][left_col] = f"=SUM({layout.left_range(start, end)})"
             
             # Column N: Sum of corresponding right panel rows
             if start in linkage:
                 right_start, right_end = linkage[start]
-                ws.cell(summary_row, 14).value = f"=SUM(T{right_start}:Z{right_end})"
+                cells[summary_row][right_col] = f"=SUM({layout.right_range(right_start, right_end)})"
             else:
-                ws.cell(summary_row, 14).value = 0
+                cells[summary_row][right_col] = 0
             
             # Column O: Total
-            ws.cell(summary_row, 15).value = f"=M{summary_row}+N{summary_row}"
+            cells[summary_row][total_col] = f"={m}{summary_row}+{n}{summary_row}"
             
             # Column P: Percentage
-            ws.cell(summary_row, 16).value = f"=(O{summary_row}/$O${total_row})*100"
+            cells[summary_row][pct_col] = f"=({o}{summary_row}/${o}${total_row})*100"
         
-        # Write total row formulas
+        # Total row formulas
         first_summary_row = left_structure[0]['end_row'] + 1
         last_summary_row = left_structure[-1]['end_row'] + 1
         
-        ws.cell(total_row, 13).value = f"=SUM(M{first_summary_row}:M{last_summary_row})"
-        ws.cell(total_row, 14).value = f"=SUM(N{first_summary_row}:N{last_summary_row})"
-        ws.cell(total_row, 15).value = f"=SUM(O{first_summary_row}:O{last_summary_row})"
-        ws.cell(total_row, 16).value = "100"  # Total percentage
+        cells[total_row][left_col] = f"=SUM({m}{first_summary_row}:{m}{last_summary_row})"
+        cells[total_row][right_col] = f"=SUM({n}{first_summary_row}:{n}{last_summary_row})"
+        cells[total_row][total_col] = f"=SUM({o}{first_summary_row}:{o}{last_summary_row})"
+        cells[total_row][pct_col] = "100"  # Total percentage
+        
+        return cells
+    
+    def _summary_value_cells(self, 
+                             left_structure: List[Dict], 
+                             right_structure: List[Dict], 
+                             linkage: Dict,
+                             layout: Optional[PanelLayout] = None) -> Dict[int, Dict[int, object]]:
+        """
+        Computed counterparts of the summary formulas in the summary columns
+        (M-P for 7 samples), as row -> {column: value}
+        Totals and percentages cover every left group, including the last one
+        whose summary row is shared with the total row.
+        """
+        cells = defaultdict(dict)
+        if not left_structure:
+            return cells
+        
+        layout = layout or PanelLayout()
+        summary_cols = range(layout.summary_col, layout.summary_col + 4)
+        
+        # Per-row intensity totals of the right panel, as a prefix sum over rows
+        last_right_row = max((g['end_row'] for g in right_structure), default=0)
+        right_row_totals = np.zeros(last_right_row + 2)
+        for group in right_structure:
+            for seq_row in group['sequences']:
+                right_row_totals[seq_row['row']] = np.sum(seq_row['data']['intensities'])
+        right_cumulative = np.cumsum(right_row_totals)
+        
+        left_sums = np.array([
+            np.sum([s['data']['intensities'] for s in group['sequences']]) for group in left_structure
+        ])
+        right_sums = np.zeros(len(left_structure))
+        for i, group in enumerate(left_structure):
+            if group['start_row'] in linkage:
+                right_start, right_end = linkage[group['start_row']]
+                right_sums[i] = right_cumulative[right_end] - right_cumulative[right_start - 1]
+        totals = left_sums + right_sums
+        grand_total = totals.sum()
+        percentages = totals / grand_total * 100 if grand_total else np.zeros(len(totals))
+        
+        for group, values in zip(left_structure, zip(left_sums, right_sums, totals, percentages)):
+            summary_row = group['end_row'] + 1
+            cells[summary_row].update({col: float(v) for col, v in zip(summary_cols, values)})
+        
+        total_row = max(g['end_row'] for g in left_structure) + 1
+        totals_row = (float(left_sums.sum()), float(right_sums.sum()), float(grand_total), 100.0)
+        cells[total_row].update(dict(zip(summary_cols, totals_row)))
+        
+        return cells
+    
+    def _raw_sheet(self, sheet_name: str, streaming: bool):
+        """Worksheet to parse ``sheet_name`` from"""
+        if self._reads_from_file(sheet_name, streaming):
+            return self._open_read_only()[sheet_name]
+        return self.wb[sheet_name]
+    
+    def _reads_from_file(self, sheet_name: str, streaming: bool) -> bool:
+        """Whether ``sheet_name`` is parsed from the file on disk rather than ``self.wb``"""
+        if self.table_input:
+            return True
+        # Lazy mappers read from disk until the full workbook has been loaded;
+        # sheets that only exist in memory always come from the full workbook,
+        # and raw .xls sheets never reach it. With a disk cache, unedited
+        # sheets are read from the file too, so their parse can be cached
+        if sheet_name not in self._open_read_only().sheetnames:
+            return False
+        return (streaming or self._wb is None or sheet_name not in self._wb.sheetnames
+                or (self.disk_cache is not None and sheet_name not in self._modified_sheets))
+    
+    def _sample_count(self, ws) -> int:
+        """
+        Number of samples in a raw sheet: the fixed ``num_samples``, or the
+        run of non-empty header labels in row 1 starting at column C
+        """
+        if self.num_samples:
+            return self.num_samples
+        header = next(ws.iter_rows(min_row=1, max_row=1, min_col=self.intensity_start_col, values_only=True), ())
+        count = 0
+        for label in header:
+            if label is None or not str(label).strip():
+                break
+            count += 1
+        return count or DEFAULT_NUM_SAMPLES
+    
+    def parse_raw_worksheet(self, 
+                            sheet_name: str, 
+                            streaming: Optional[bool] = None,
+                            use_cache: bool = True) -> Dict:
+        """
+        Parse raw data from worksheet
+        
+        Results are memoized per sheet name, so ``process``,
+        ``create_visualizations`` and ``create_comprehensive_report`` share a
+        single parse of each sheet. The returned dict is shared between
+        callers and should be treated as read-only.
+        
+        Args:
+            sheet_name: Name of the raw worksheet
+            streaming: Read rows from a read-only workbook in a single forward
+                pass (defaults to the mapper's ``streaming`` setting)
+            use_cache: Return (and store) the memoized parse for this sheet
+        """
+        if use_cache and sheet_name in self._parse_cache:
+            return self._parse_cache[sheet_name]
+        
+        disk_key = self._disk_cache_key(sheet_name)
+        if disk_key is not None:
+            raw_data = self.disk_cache.get(disk_key)
+            if raw_data is not None:
+                if use_cache:
+                    self._parse_cache[sheet_name] = raw_data
+                return raw_data
+        
+        if streaming is None:
+            streaming = self.streaming
+        
+        if self.table_input and sheet_name == self.table_sheet_name:
+            raw_data = read_peptide_table(self.workbook_path, **self.table_options)
+        else:
+            raw_data = self._parse_sheet_rows(sheet_name, streaming)
+        
+        if self.cleavage_residues != 'notation':
+            raw_data['sequences'].derive_cleavage_residues(raw_data['reference'], self.cleavage_residues)
+        
+        if use_cache:
+            self._parse_cache[sheet_name] = raw_data
+        # Only parses of the file on disk match the key's content hash
+        if disk_key is not None and self._reads_from_file(sheet_name, streaming):
+            try:
+                self.disk_cache.put(disk_key, raw_data)
+            except OSError as e:
+                # The cache is an optimization; a full or read-only disk never fails a parse
+                print(f"⚠ Could not cache parse of {sheet_name}: {e}")
+        
+        return raw_data
     
-    def parse_raw_worksheet(self, sheet_name: str) -> Dict:
-        """Parse raw data from worksheet"""
-        ws = self.wb[sheet_name]
+    def _parse_sheet_rows(self, sheet_name: str, streaming: bool) -> Dict:
+        """Parse a raw worksheet (reference in B4, peptides from row 5)"""
+        ws = self._raw_sheet(sheet_name, streaming)
+        num_samples = self._sample_count(ws)
+        intensity_end_col = self.intensity_start_col + num_samples - 1
+        rows = ws.iter_rows(min_row=4, max_col=intensity_end_col, values_only=True)
         
         # Extract reference sequence (row 4)
-        reference = ws.cell(4, 2).value
+        first_row = next(rows, None)
+        reference = first_row[1] if first_row else None
         if not reference:
             raise ValueError(f"No reference sequence found in {sheet_name} row 4")
         
-        sequences = []
-        pattern = re.compile(r'\(([A-Z])\)')
+        columns = {'number': [], 'original': [], 'intensities': []}
+        intensity_slice = slice(self.intensity_start_col - 1, intensity_end_col)
         
-        for row in range(5, ws.max_row + 1):
-            seq = ws.cell(row, 2).value
+        for row in rows:
+            seq = row[1]
             if not seq:
                 continue
             
-            # Parse cleavage notation
-            cleavages = pattern.findall(seq)
-            clean_seq = re.sub(r'[()]', '', seq)
-            
             # Extract intensities
             intensities = []
             has_data = False
-            for col in range(self.intensity_start_col, self.intensity_end_col + 1):
-                val = ws.cell(row, col).value
+            for val in row[intensity_slice]:
                 if val and val > 0:
                     has_data = True
                 intensities.append(val if val else 0)
             
-            if has_data:
-                sequences.append({
-                    'number': ws.cell(row, 1).value,
-                    'original': seq,
-                    'clean': clean_seq,
-                    'left_cleavage': cleavages[0] if len(cleavages) > 0 else None,
-                    'right_cleavage': cleavages[1] if len(cleavages) > 1 else None,
-                    'intensities': intensities
-                })
+            if not has_data:
+                continue
+            
+            columns['number'].append(row[0])
+            columns['original'].append(seq)
+            columns['intensities'].append(intensities)
+        
+        if not columns['intensities']:
+            columns['intensities'] = np.zeros((0, num_samples))
+        
+        # Parse cleavage notation for the whole sequence column in one pass
+        notation = parse_cleavage_notation(columns['original'])
+        _report_notation(sheet_name, notation, columns['number'])
+        columns['clean'] = notation['clean']
+        columns['left_cleavage'] = notation['left_cleavage']
+        columns['right_cleavage'] = notation['right_cleavage']
         
         return {
             'reference': reference,
-            'sequences': sequences
+            'sequences': PeptideTable(**columns)
         }
     
     def process(self, input_sheet: str, output_sheet: str, sample_labels: Optional[List[str]] = None):
@@ -339,15 +1525,227 @@ class AdvancedCleavageMapper:
         print(f"  Sequences: {len(raw_data['sequences'])}")
         
         # Generate output
-        ws = self.write_processed_worksheet(raw_data, output_sheet, sample_labels)
-        print(f"  Generated: {ws.max_row} rows")
+        rows = self.build_processed_rows(raw_data, sample_labels)
+        ws = self.write_processed_rows(output_sheet, rows)
+        print(f"  Generated: {len(rows)} rows")
         
         return ws
     
+    def process_sheets(self, 
+                       sheets: List[Tuple[str, Optional[str]]],
+                       sample_labels: Optional[List[str]] = None,
+                       output_prefixes: Optional[Dict[str, str]] = None,
+                       jobs: Optional[int] = None,
+                       top_n_peptides: Optional[int] = 50) -> List[Dict]:
+        """
+        Process several worksheets, each in its own worker process
+        
+        Every (input_sheet, output_sheet) pair is parsed, analyzed and, if it
+        has an entry in ``output_prefixes``, rendered by a worker; the parent
+        only writes the returned rows to ``output_sheet`` (skipped when None)
+        and keeps the parsed data for later reports. Workers read raw sheets
+        from the file on disk. Returns the job results in input order, with
+        errors under 'error' instead of raised.
+        
+        Args:
+            sheets: (input_sheet, output_sheet) pairs
+            sample_labels: Labels for the samples
+            output_prefixes: Figure filename prefix per input sheet
+            jobs: Worker processes (default: one per CPU; 1 runs in-process)
+            top_n_peptides: Number of top peptides to show in each heatmap
+        """
+        output_prefixes = output_prefixes or {}
+        jobs = min(jobs or os.cpu_count() or 1, len(sheets))
+        job_args = [(input_sheet, sample_labels, output_prefixes.get(input_sheet), output_sheet is not None,
+                     top_n_peptides) for input_sheet, output_sheet in sheets]
+        
+        if jobs <= 1:
+            results = [_run_sheet_job(self, *args, return_data=True) for args in job_args]
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                futures = [pool.submit(_run_sheet_job, self, *args, return_data=True) for args in job_args]
+                results = [future.result() for future in futures]
+        
+        # Merge in input order so the output workbook does not depend on timing
+        for (input_sheet, output_sheet), result in zip(sheets, results):
+            if result['error']:
+                print(f"\n✗ {input_sheet}: {result['error']}")
+                continue
+            self._parse_cache.setdefault(input_sheet, result.pop('raw_data'))
+            if output_sheet is not None:
+                print(f"\nProcessing: {input_sheet} -> {output_sheet}")
+                self.write_processed_rows(output_sheet, result['rows'])
+                print(f"  Generated: {len(result['rows'])} rows")
+        
+        return results
+    
+    def run_pipeline(self,
+                     sheets: List[Tuple[str, Optional[str]]],
+                     sample_labels: Optional[List[str]] = None,
+                     output_prefixes: Optional[Dict[str, str]] = None,
+                     output_path: Optional[str] = None,
+                     render_workers: Optional[int] = None,
+                     queue_size: int = 2,
+                     top_n_peptides: Optional[int] = 50) -> List[Dict]:
+        """
+        Process worksheets as a staged pipeline
+        
+        A parse thread reads the next raw sheet while a build thread lays out
+        the previous one; this thread writes the rows and hands each sheet's
+        figures to a pool of render processes. Stages are connected by
+        bounded queues (``queue_size`` sheets each), and the workbook is saved
+        to ``output_path`` (if given) while the last figures are still being
+        rendered. Errors in any stage are reported per sheet; if the writer
+        stops early, the upstream stages are told to stop instead of waiting
+        on full queues.
+        
+        Args:
+            sheets: (input_sheet, output_sheet) pairs; output_sheet None skips
+                writing that sheet
+            sample_labels: Labels for the samples
+            output_prefixes: Figure filename prefix per input sheet
+            output_path: Save the workbook here once all sheets are written
+            render_workers: Render processes (default: one per CPU)
+            queue_size: Maximum sheets waiting between two stages
+            top_n_peptides: Number of top peptides to show in each heatmap
+        
+        Returns:
+            One dict per sheet, in input order: 'sheet', 'rows' (row count),
+            'figures' and 'error'
+        """
+        output_prefixes = output_prefixes or {}
+        parsed = queue.Queue(maxsize=queue_size)
+        built = queue.Queue(maxsize=queue_size)
+        done = object()
+        stop = threading.Event()
+        
+        def put(q: queue.Queue, item) -> bool:
+            # Blocking put that gives up once the pipeline is stopped
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+        
+        def get(q: queue.Queue):
+            # Blocking get that returns done once the pipeline is stopped
+            while not stop.is_set():
+                try:
+                    return q.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            return done
+        
+        def parse_stage():
+            for input_sheet, output_sheet in sheets:
+                try:
+                    # Read-only handle: the writer may be adding sheets to self.wb
+                    item = (input_sheet, output_sheet, self.parse_raw_worksheet(input_sheet, streaming=True), None)
+                except Exception as e:
+                    item = (input_sheet, output_sheet, None, e)
+                if not put(parsed, item):
+                    return
+            put(parsed, done)
+        
+        def build_stage():
+            for item in iter(lambda: get(parsed), done):
+                input_sheet, output_sheet, raw_data, error = item
+                rows = None
+                if error is None and output_sheet is not None:
+                    try:
+                        rows = self.build_processed_rows(raw_data, sample_labels)
+                    except Exception as e:
+                        error = e
+                if not put(built, (input_sheet, output_sheet, raw_data, rows, error)):
+                    return
+            put(built, done)
+        
+        stages = [threading.Thread(target=parse_stage, daemon=True), 
+                  threading.Thread(target=build_stage, daemon=True)]
+        for stage in stages:
+            stage.start()
+        
+        results = {}
+        renders = []
+        render_pool = None
+        if any(output_prefixes.get(input_sheet) for input_sheet, _ in sheets):
+            render_pool = ProcessPoolExecutor(max_workers=render_workers or os.cpu_count() or 1)
+        
+        try:
+            # Write stage
+            for item in iter(built.get, done):
+                input_sheet, output_sheet, raw_data, rows, error = item
+                result = results[input_sheet] = {'sheet': input_sheet, 'rows': 0, 'figures': [], 'error': None}
+                if error is not None:
+                    result['error'] = f"{type(error).__name__}: {error}"
+                    print(f"\n✗ {input_sheet}: {result['error']}")
+                    continue
+                
+                try:
+                    if rows is not None:
+                        print(f"\nProcessing: {input_sheet} -> {output_sheet}")
+                        self.write_processed_rows(output_sheet, rows)
+                        result['rows'] = len(rows)
+                        print(f"  Generated: {len(rows)} rows")
+                    
+                    prefix = output_prefixes.get(input_sheet)
+                    if prefix:
+                        figures = [('create_intensity_heatmap', f"{prefix}_heatmap.png", {'top_n': top_n_peptides}),
+                                   ('create_positional_intensity_heatmap', f"{prefix}_positional_heatmap.png", {}),
+                                   ('create_cleavage_summary_plot', f"{prefix}_cleavage_summary.png", {})]
+                        for method, path, kwargs in figures:
+                            future = render_pool.submit(_render_figure, self, method, raw_data, sample_labels, path, kwargs)
+                            renders.append((input_sheet, path, future))
+                except Exception as e:
+                    result['error'] = f"{type(e).__name__}: {e}"
+                    print(f"\n✗ {input_sheet}: {result['error']}")
+            
+            # Save while the last figures are still rendering
+            if output_path is not None:
+                self.save(output_path)
+            
+            for input_sheet, path, future in renders:
+                try:
+                    future.result()
+                    results[input_sheet]['figures'].append(path)
+                except Exception as e:
+                    results[input_sheet]['error'] = f"{type(e).__name__}: {e}"
+                    print(f"\n✗ {input_sheet}: {results[input_sheet]['error']}")
+        finally:
+            # Unblock the producers if the write stage ended early
+            stop.set()
+            for stage in stages:
+                stage.join()
+            if render_pool is not None:
+                render_pool.shutdown()
+        
+        return [results[input_sheet] for input_sheet, _ in sheets]
+    
     def save(self, output_path: Optional[str] = None):
-        """Save workbook"""
+        """
+        Save workbook
+        In 'processed' output mode only the generated sheets are written, and
+        the streamed workbook can be saved once.
+        """
+        if self.output_mode == 'processed':
+            if self._output_wb is None:
+                print("\n⚠ No processed sheets to save")
+                return
+            output_path = output_path or "processed_cleavage_mapper_output.xlsx"
+            self._output_wb.save(output_path)
+            print(f"\nSaved: {output_path}")
+            return
+        
+        if not self.wb.sheetnames:
+            print("\n⚠ No processed sheets to save")
+            return
+        
         if output_path:
             self.wb.save(output_path)
+            if os.path.abspath(output_path) == os.path.abspath(self.workbook_path):
+                self._content_hash = None
             print(f"\nSaved: {output_path}")
         else:
             # Default to saving with processed suffix
@@ -355,41 +1753,113 @@ class AdvancedCleavageMapper:
             self.wb.save(default_path)
             print(f"\nSaved: {default_path}")
     
+    def _positional_matrices(self, table: PeptideTable, reference: str, num_columns: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Position x sample intensity and count matrices for one sheet, using
+        the mapper's multi-mapping policy, with one column per sample label
+        """
+        coverage, counts = table.coverage(reference, self.multi_map_policy)
+        
+        width = min(num_columns, table.num_samples)
+        position_intensities = np.zeros((len(reference), num_columns))
+        position_counts = np.zeros((len(reference), num_columns))
+        position_intensities[:, :width] = coverage[:, :width]
+        position_counts[:, :width] = counts[:, :width]
+        return position_intensities, position_counts
+    
+    @staticmethod
+    def _use_fast_renderer(renderer: str, num_rows: int) -> bool:
+        if renderer not in HEATMAP_RENDERERS:
+            raise ValueError(f"renderer must be one of {HEATMAP_RENDERERS}, got {renderer!r}")
+        return renderer == 'fast' or (renderer == 'auto' and num_rows > FAST_HEATMAP_ROWS)
+    
+    def _render_fast_heatmap(self,
+                             log_data: np.ndarray,
+                             row_labels: Callable[[np.ndarray], List[str]],
+                             sample_labels: List[str],
+                             output_path: str,
+                             figsize: Tuple[int, int],
+                             cmap: str,
+                             title: str,
+                             ylabel: str) -> Figure:
+        """
+        Draw a rows x samples matrix as one rasterized mesh on an Agg canvas, labelling
+        only as many rows as fit the figure height. row_labels maps the
+        labelled row indices to their tick labels.
+        The figure is not registered with pyplot, so it works without a
+        display and is freed as soon as it is dropped.
+        """
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+        
+        mesh = ax.pcolormesh(log_data, cmap=cmap, rasterized=True)
+        fig.colorbar(mesh, ax=ax, label='Log10(Intensity + 1)')
+        ax.invert_yaxis()
+        
+        # About six 8pt labels per inch of figure height
+        max_ticks = max(1, int(figsize[1] * 6))
+        ticks = np.arange(0, len(log_data), max(1, -(-len(log_data) // max_ticks)))
+        ax.set_yticks(ticks + 0.5)
+        ax.set_yticklabels(row_labels(ticks), fontsize=8)
+        ax.set_xticks(np.arange(len(sample_labels)) + 0.5)
+        ax.set_xticklabels(sample_labels, rotation=45, ha='right')
+        
+        ax.set_title(title)
+        ax.set_xlabel('Samples')
+        ax.set_ylabel(ylabel)
+        fig.tight_layout()
+        fig.savefig(output_path, dpi=300, bbox_inches='tight')
+        return fig
+    
     def create_positional_intensity_heatmap(self, 
                                            raw_data: Dict, 
                                            sample_labels: Optional[List[str]] = None,
                                            output_path: str = "positional_intensity_heatmap.png",
-                                           figsize: Tuple[int, int] = (14, 10)):
+                                           figsize: Tuple[int, int] = (14, 10),
+                                           renderer: str = 'auto',
+                                           bin_size=None,
+                                           reduce: str = 'max'):
         """
         Create a heatmap showing intensities by amino acid position in the reference sequence
         Y-axis shows amino acid positions, X-axis shows samples
+        renderer picks 'seaborn', 'fast' (single Agg image, for long
+        references) or 'auto' (fast above FAST_HEATMAP_ROWS positions)
+        bin_size groups that many consecutive residues per row, reduced with
+        reduce ('max', 'mean' or 'sum'); 'auto' picks the smallest bin that
+        fits about 20 rows per inch of figure height, None shows every residue
         """
-        sequences = raw_data['sequences']
+        _check_bin_options(bin_size, reduce, allow_auto=True)
+        table = _as_peptide_table(raw_data['sequences'])
         reference = raw_data['reference']
-        
-        if sample_labels is None:
-            sample_labels = [f'Sample_{i}' for i in range(1, self.num_samples + 1)]
+        sample_labels = self._sample_labels(table.num_samples, sample_labels)
         
         # Create position-based intensity matrix
         # Each position in reference sequence gets aggregated intensities
-        position_intensities = np.zeros((len(reference), len(sample_labels)))
-        position_counts = np.zeros((len(reference), len(sample_labels)))
+        position_intensities, position_counts = self._positional_matrices(table, reference, len(sample_labels))
         
-        for seq_data in sequences:
-            clean_seq = seq_data['clean']
-            intensities = seq_data['intensities']
-            
-            # Find where this sequence maps in the reference
-            if clean_seq in reference:
-                start_pos = reference.index(clean_seq)
-                end_pos = start_pos + len(clean_seq)
-                
-                # Add intensities to each position covered by this sequence
-                for pos in range(start_pos, end_pos):
-                    for sample_idx, intensity in enumerate(intensities):
-                        if intensity and intensity > 0:
-                            position_intensities[pos, sample_idx] += intensity
-                            position_counts[pos, sample_idx] += 1
+        if bin_size == 'auto':
+            bin_size = -(-len(reference) // max(1, int(figsize[1] * 20)))
+        if bin_size is not None and bin_size > 1:
+            return self._plot_binned_positions(position_intensities, reference, bin_size, reduce,
+                                               sample_labels, output_path, figsize, renderer)
+        
+        positions = np.flatnonzero(position_intensities.sum(axis=1) > 0)
+        if len(positions) == 0:
+            print("⚠ No positional data to plot")
+            return None
+        
+        if self._use_fast_renderer(renderer, len(positions)):
+            fig = self._render_fast_heatmap(
+                np.log10(position_intensities[positions] + 1),
+                lambda rows: [f'{reference[i]}{i+1}' for i in positions[rows]],
+                sample_labels, output_path, figsize, 'plasma',
+                f'Peptide Position Intensity Heatmap\n({len(positions)} positions with data)',
+                'Amino Acid Position'
+            )
+            print(f"✓ Positional heatmap saved to: {output_path}")
+            print(f"✓ Positions with data: {len(positions)}/{len(reference)}")
+            return fig
         
         # Create position labels (amino acid + position number)
         position_labels = [f'{reference[i]}{i+1}' for i in range(len(reference))]
@@ -433,12 +1903,62 @@ class AdvancedCleavageMapper:
         
         return plt.gcf()
 
+    def _plot_binned_positions(self,
+                               position_intensities: np.ndarray,
+                               reference: str,
+                               bin_size: int,
+                               reduce: str,
+                               sample_labels: List[str],
+                               output_path: str,
+                               figsize: Tuple[int, int],
+                               renderer: str):
+        """Positional heatmap with one row per bin of bin_size residues"""
+        binned, starts = bin_positions(position_intensities, bin_size, reduce)
+        ends = np.minimum(starts + bin_size, len(reference))
+        bin_labels = np.array([f'{reference[s]}{s+1}' + (f'-{reference[e-1]}{e}' if e - s > 1 else '')
+                               for s, e in zip(starts, ends)])
+        
+        with_data = np.flatnonzero(binned.sum(axis=1) > 0)
+        if len(with_data) == 0:
+            print("⚠ No positional data to plot")
+            return None
+        
+        log_data = np.log10(binned[with_data] + 1)
+        title = (f'Peptide Position Intensity Heatmap\n'
+                 f'({len(with_data)} bins of {bin_size} residues with data, {reduce})')
+        ylabel = 'Amino Acid Position (binned)'
+        
+        if self._use_fast_renderer(renderer, len(with_data)):
+            fig = self._render_fast_heatmap(log_data, lambda rows: list(bin_labels[with_data[rows]]),
+                                            sample_labels, output_path, figsize, 'plasma', title, ylabel)
+        else:
+            plt.figure(figsize=figsize)
+            sns.heatmap(pd.DataFrame(log_data, index=bin_labels[with_data], columns=sample_labels),
+                       annot=False,
+                       cmap='plasma',
+                       cbar_kws={'label': 'Log10(Intensity + 1)'},
+                       xticklabels=True,
+                       yticklabels=True)
+            plt.title(title)
+            plt.xlabel('Samples')
+            plt.ylabel(ylabel)
+            plt.xticks(rotation=45, ha='right')
+            plt.yticks(rotation=0, fontsize=8)
+            plt.tight_layout()
+            plt.savefig(output_path, dpi=300, bbox_inches='tight')
+            fig = plt.gcf()
+        
+        print(f"✓ Positional heatmap saved to: {output_path}")
+        print(f"✓ Bins with data: {len(with_data)}/{len(starts)} ({bin_size} residues per bin, {reduce})")
+        return fig
+    
     def create_intensity_heatmap(self, 
                                 raw_data: Dict, 
                                 sample_labels: Optional[List[str]] = None,
                                 output_path: str = "intensity_heatmap.png",
                                 figsize: Tuple[int, int] = (12, 8),
-                                top_n: Optional[int] = None):
+                                top_n: Optional[int] = None,
+                                renderer: str = 'auto'):
         """
         Create a heatmap showing intensities for each peptide across samples
         
@@ -448,23 +1968,15 @@ class AdvancedCleavageMapper:
             output_path: Path to save the heatmap image
             figsize: Figure size (width, height)
             top_n: Show only top N peptides by total intensity (None for all)
+            renderer: 'seaborn', 'fast' (single Agg image with decimated
+                labels) or 'auto' (fast above FAST_HEATMAP_ROWS peptides)
         """
-        sequences = raw_data['sequences']
-        
-        if sample_labels is None:
-            sample_labels = [f'Sample_{i}' for i in range(1, self.num_samples + 1)]
+        table = _as_peptide_table(raw_data['sequences'])
+        sample_labels = self._sample_labels(table.num_samples, sample_labels)
         
         # Create data matrix
-        peptide_names = []
-        intensity_matrix = []
-        
-        for seq in sequences:
-            peptide_names.append(seq['clean'][:20] + ('...' if len(seq['clean']) > 20 else ''))
-            intensity_matrix.append(seq['intensities'])
-        
-        # Convert to numpy array and pandas DataFrame
-        intensity_array = np.array(intensity_matrix)
-        df = pd.DataFrame(intensity_array, 
+        peptide_names = [clean[:20] + ('...' if len(clean) > 20 else '') for clean in table.clean]
+        df = pd.DataFrame(table.intensities, 
                          index=peptide_names, 
                          columns=sample_labels)
         
@@ -474,29 +1986,39 @@ class AdvancedCleavageMapper:
             top_peptides = total_intensities.nlargest(top_n).index
             df = df.loc[top_peptides]
         
-        # Create the heatmap
-        plt.figure(figsize=figsize)
+        if df.empty:
+            print("⚠ No peptide data to plot")
+            return None
         
         # Use log scale for better visualization of wide intensity ranges
         # Add 1 to avoid log(0) issues
         log_data = np.log10(df + 1)
+        title = f'Peptide Intensity Heatmap\n({len(df)} peptides across {len(sample_labels)} samples)'
         
-        sns.heatmap(log_data, 
-                   annot=False,  # Don't annotate due to space constraints
-                   cmap='viridis',
-                   cbar_kws={'label': 'Log10(Intensity + 1)'},
-                   xticklabels=True,
-                   yticklabels=True)
-        
-        plt.title(f'Peptide Intensity Heatmap\n({len(df)} peptides across {len(sample_labels)} samples)')
-        plt.xlabel('Samples')
-        plt.ylabel('Peptides')
-        plt.xticks(rotation=45, ha='right')
-        plt.yticks(rotation=0, fontsize=8)
-        plt.tight_layout()
-        
-        # Save the plot
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
+        if self._use_fast_renderer(renderer, len(df)):
+            fig = self._render_fast_heatmap(log_data.to_numpy(), lambda rows: list(df.index[rows]),
+                                            sample_labels, output_path, figsize, 'viridis', title, 'Peptides')
+        else:
+            # Create the heatmap
+            plt.figure(figsize=figsize)
+            
+            sns.heatmap(log_data, 
+                       annot=False,  # Don't annotate due to space constraints
+                       cmap='viridis',
+                       cbar_kws={'label': 'Log10(Intensity + 1)'},
+                       xticklabels=True,
+                       yticklabels=True)
+            
+            plt.title(title)
+            plt.xlabel('Samples')
+            plt.ylabel('Peptides')
+            plt.xticks(rotation=45, ha='right')
+            plt.yticks(rotation=0, fontsize=8)
+            plt.tight_layout()
+            
+            # Save the plot
+            plt.savefig(output_path, dpi=300, bbox_inches='tight')
+            fig = plt.gcf()
         print(f"✓ Heatmap saved to: {output_path}")
         
         # Show basic statistics
@@ -507,7 +2029,7 @@ class AdvancedCleavageMapper:
         print(f"  - Min intensity: {df.min().min():,.0f}")
         print(f"  - Mean intensity: {df.mean().mean():,.0f}")
         
-        return plt.gcf()
+        return fig
     
     def create_cleavage_summary_plot(self, 
                                    raw_data: Dict,
@@ -517,25 +2039,12 @@ class AdvancedCleavageMapper:
         """
         Create a summary plot showing cleavage patterns
         """
-        sequences = raw_data['sequences']
-        
-        if sample_labels is None:
-            sample_labels = [f'Sample_{i}' for i in range(1, self.num_samples + 1)]
-        
-        # Analyze cleavage patterns
-        analysis = self.analyze_sequence_structure(sequences, raw_data['reference'])
+        table = _as_peptide_table(raw_data['sequences'])
+        sample_labels = self._sample_labels(table.num_samples, sample_labels)
         
-        # Prepare data for plotting
-        n_term_data = {}
-        c_term_data = {}
-        
-        for residue, seqs in analysis['n_terminal_groups'].items():
-            total_intensity = sum(sum(seq['intensities']) for seq in seqs)
-            n_term_data[residue] = total_intensity
-        
-        for residue, seqs in analysis['c_terminal_groups'].items():
-            total_intensity = sum(sum(seq['intensities']) for seq in seqs)
-            c_term_data[residue] = total_intensity
+        # Total intensity per cleavage residue
+        n_term_data = table.residue_totals('left')
+        c_term_data = table.residue_totals('right')
         
         # Create subplots
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=figsize)
@@ -570,7 +2079,12 @@ class AdvancedCleavageMapper:
                             input_sheet: str, 
                             sample_labels: Optional[List[str]] = None,
                             output_prefix: str = "cleavage_analysis",
-                            top_n_peptides: Optional[int] = 50):
+                            top_n_peptides: Optional[int] = 50,
+                            workers: Optional[int] = None,
+                            executor=None,
+                            renderer: str = 'auto',
+                            bin_size=None,
+                            reduce: str = 'max'):
         """
         Create all visualizations for a given worksheet
         
@@ -579,24 +2093,48 @@ class AdvancedCleavageMapper:
             sample_labels: Labels for the samples  
             output_prefix: Prefix for output filenames
             top_n_peptides: Number of top peptides to show in heatmap
+            workers: Render the figures concurrently in this many worker
+                processes (None or 1 renders them one after another)
+            executor: Existing process pool to render on (overrides workers)
+            renderer: Heatmap renderer, 'seaborn', 'fast' or 'auto'
+            bin_size: Residues per row of the positional heatmap (int or 'auto')
+            reduce: How binned residues are combined, 'max', 'mean' or 'sum'
         """
         print(f"\nCreating visualizations for: {input_sheet}")
         
         # Parse the data
         raw_data = self.parse_raw_worksheet(input_sheet)
         
-        # Create traditional sequence heatmap
         heatmap_path = f"{output_prefix}_heatmap.png"
-        self.create_intensity_heatmap(raw_data, sample_labels, heatmap_path, 
-                                    top_n=top_n_peptides)
-        
-        # Create positional heatmap
         positional_path = f"{output_prefix}_positional_heatmap.png"
-        self.create_positional_intensity_heatmap(raw_data, sample_labels, positional_path)
-        
-        # Create cleavage summary
         summary_path = f"{output_prefix}_cleavage_summary.png"
-        self.create_cleavage_summary_plot(raw_data, sample_labels, summary_path)
+        figures = [
+            # Traditional sequence heatmap
+            ('create_intensity_heatmap', heatmap_path, {'top_n': top_n_peptides, 'renderer': renderer}),
+            # Positional heatmap
+            ('create_positional_intensity_heatmap', positional_path,
+             {'renderer': renderer, 'bin_size': bin_size, 'reduce': reduce}),
+            # Cleavage summary
+            ('create_cleavage_summary_plot', summary_path, {})
+        ]
+        
+        own_pool = None
+        if executor is None and workers is not None and workers > 1:
+            executor = own_pool = ProcessPoolExecutor(max_workers=min(workers, len(figures)))
+        
+        if executor is not None:
+            # Workers get the parsed data, so nothing is parsed twice
+            try:
+                futures = [executor.submit(_render_figure, self, method, raw_data, sample_labels, path, kwargs)
+                           for method, path, kwargs in figures]
+                for future in futures:
+                    future.result()
+            finally:
+                if own_pool is not None:
+                    own_pool.shutdown()
+        else:
+            for method, path, kwargs in figures:
+                getattr(self, method)(raw_data, sample_labels, path, **kwargs)
         
         # Close plots to free memory
         plt.close('all')
@@ -626,15 +2164,12 @@ class AdvancedCleavageMapper:
                 ('500 mgd glucose', '500 mgd')
             ]
         
-        if sample_labels is None:
-            sample_labels = [f'Sample_{i}' for i in range(1, self.num_samples + 1)]
-        
         print(f"\n=== Creating Comprehensive Report ===")
         
         # Load data for all conditions
         all_data = {}
         for worksheet, display_name in conditions:
-            if worksheet in self.wb.sheetnames:
+            if worksheet in self.sheetnames:
                 try:
                     raw_data = self.parse_raw_worksheet(worksheet)
                     all_data[display_name] = raw_data
@@ -646,6 +2181,18 @@ class AdvancedCleavageMapper:
             print("✗ No data available for report")
             return None
         
+        if sample_labels is None:
+            max_samples = max(_as_peptide_table(d['sequences']).num_samples for d in all_data.values())
+            sample_labels = self._sample_labels(max_samples)
+        
+        # Positional matrices, built once per condition and shared by the
+        # heatmap row and the summary table
+        coverage_data = {
+            condition_name: self._positional_matrices(
+                _as_peptide_table(raw_data['sequences']), raw_data['reference'], len(sample_labels))
+            for condition_name, raw_data in all_data.items()
+        }
+        
         # Create comprehensive figure with multiple subplots
         fig = plt.figure(figsize=figsize)
         
@@ -662,24 +2209,9 @@ class AdvancedCleavageMapper:
                 continue
             ax = fig.add_subplot(gs[0, idx])
             
-            # Create positional intensity matrix
+            # Positional intensity matrix
             reference = raw_data['reference']
-            sequences = raw_data['sequences']
-            
-            position_intensities = np.zeros((len(reference), len(sample_labels)))
-            
-            for seq_data in sequences:
-                clean_seq = seq_data['clean']
-                intensities = seq_data['intensities']
-                
-                if clean_seq in reference:
-                    start_pos = reference.index(clean_seq)
-                    end_pos = start_pos + len(clean_seq)
-                    
-                    for pos in range(start_pos, end_pos):
-                        for sample_idx, intensity in enumerate(intensities):
-                            if intensity and intensity > 0:
-                                position_intensities[pos, sample_idx] += intensity
+            position_intensities, _ = coverage_data[condition_name]
             
             # Filter positions with data and create labels
             has_data = position_intensities.sum(axis=1) > 0
@@ -720,24 +2252,14 @@ class AdvancedCleavageMapper:
         total_intensities = {}
         
         for condition_name, raw_data in all_data.items():
-            analysis = self.analyze_sequence_structure(raw_data['sequences'], raw_data['reference'])
-            
-            # N-terminal data
-            n_term_data = {}
-            for residue, seqs in analysis['n_terminal_groups'].items():
-                total = sum(sum(seq['intensities']) for seq in seqs)
-                n_term_data[residue] = total
-            n_term_comparison[condition_name] = n_term_data
-            
-            # C-terminal data  
-            c_term_data = {}
-            for residue, seqs in analysis['c_terminal_groups'].items():
-                total = sum(sum(seq['intensities']) for seq in seqs)
-                c_term_data[residue] = total
-            c_term_comparison[condition_name] = c_term_data
+            table = _as_peptide_table(raw_data['sequences'])
+            
+            # N-terminal and C-terminal data
+            n_term_comparison[condition_name] = table.residue_totals('left')
+            c_term_comparison[condition_name] = table.residue_totals('right')
             
             # Total intensity
-            total_intensities[condition_name] = sum(sum(seq['intensities']) for seq in raw_data['sequences'])
+            total_intensities[condition_name] = float(table.intensities.sum())
         
         # Plot N-terminal comparison
         all_n_residues = set()
@@ -805,26 +2327,20 @@ class AdvancedCleavageMapper:
         headers = ['Condition', 'Sequences', 'Max Intensity', 'Mean Intensity', 'Positions w/ Data']
         
         for condition_name, raw_data in all_data.items():
-            sequences = raw_data['sequences']
-            all_intensities = [i for seq in sequences for i in seq['intensities'] if i > 0]
+            table = _as_peptide_table(raw_data['sequences'])
+            all_intensities = table.intensities[table.intensities > 0]
             
             # Count positions with data
             reference = raw_data['reference']
-            position_has_data = [False] * len(reference)
-            for seq_data in sequences:
-                clean_seq = seq_data['clean']
-                if clean_seq in reference and any(i > 0 for i in seq_data['intensities']):
-                    start_pos = reference.index(clean_seq)
-                    end_pos = start_pos + len(clean_seq)
-                    for pos in range(start_pos, end_pos):
-                        position_has_data[pos] = True
+            _, counts = table.coverage(reference, self.multi_map_policy)
+            position_has_data = counts.any(axis=1)
             
             table_data.append([
                 condition_name,
-                str(len(sequences)),
-                f"{max(all_intensities)/1e6:.1f}M" if all_intensities else "0",
-                f"{np.mean(all_intensities)/1e6:.1f}M" if all_intensities else "0",
-                f"{sum(position_has_data)}/{len(reference)}"
+                str(len(table)),
+                f"{all_intensities.max()/1e6:.1f}M" if all_intensities.size else "0",
+                f"{all_intensities.mean()/1e6:.1f}M" if all_intensities.size else "0",
+                f"{position_has_data.sum()}/{len(reference)}"
             ])
         
         # Create table
@@ -857,6 +2373,244 @@ class AdvancedCleavageMapper:
         return fig
 
 
+# ============================================================================
+# BATCH PROCESSING
+# ============================================================================
+
+def _render_figure(mapper: AdvancedCleavageMapper, 
+                   method: str, 
+                   raw_data: Dict, 
+                   sample_labels: Optional[List[str]], 
+                   output_path: str, 
+                   kwargs: Dict) -> str:
+    """Render one figure of create_visualizations in a worker process (Agg backend)"""
+    plt.switch_backend('Agg')
+    getattr(mapper, method)(raw_data, sample_labels, output_path, **kwargs)
+    plt.close('all')
+    return output_path
+
+WORKBOOK_SUFFIXES = ('.xlsx', '.xlsm', '.xls')
+
+def expand_batch_inputs(inputs) -> List[str]:
+    """
+    Input files for a batch run from files, directories and glob patterns
+    Directories contribute every workbook or peptide table directly inside
+    them; Excel lock files (~$...) are skipped.
+    """
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    
+    def is_input(path):
+        name = os.path.basename(path)
+        suffix = os.path.splitext(name)[1].lower()
+        return (os.path.isfile(path) and not name.startswith('~$') 
+                and (suffix in WORKBOOK_SUFFIXES or suffix in INPUT_ADAPTERS))
+    
+    paths = []
+    for item in inputs:
+        item = str(item)
+        if os.path.isdir(item):
+            paths.extend(os.path.join(item, name) for name in sorted(os.listdir(item)))
+        elif glob.has_magic(item):
+            paths.extend(sorted(glob.glob(item)))
+        else:
+            paths.append(item)
+    
+    seen = set()
+    return [p for p in paths if is_input(p) and not (p in seen or seen.add(p))]
+
+def process_sheet_job(workbook_path: str, 
+                      sheet_name: str,
+                      sample_labels: Optional[List[str]] = None,
+                      mapper_options: Optional[Dict] = None,
+                      output_prefix: Optional[str] = None) -> Dict:
+    """
+    Parse, analyze and optionally render one sheet; the unit of work of a
+    process pool
+    Returns the processed-sheet rows plus summary statistics, so the parent
+    only has to write rows into the output workbook. Errors are returned
+    under 'error' instead of raised.
+    """
+    try:
+        mapper = AdvancedCleavageMapper(workbook_path, lazy=True, output_mode='processed', 
+                                        **(mapper_options or {}))
+    except Exception as e:
+        return {'workbook': workbook_path, 'sheet': sheet_name, 'rows': None, 'figures': [], 
+                'error': f"{type(e).__name__}: {e}", 'seconds': 0.0}
+    result = _run_sheet_job(mapper, sheet_name, sample_labels, output_prefix)
+    mapper.close()
+    return result
+
+def _run_sheet_job(mapper: AdvancedCleavageMapper,
+                   sheet_name: str,
+                   sample_labels: Optional[List[str]] = None,
+                   output_prefix: Optional[str] = None,
+                   build_rows: bool = True,
+                   top_n_peptides: Optional[int] = 50,
+                   return_data: bool = False) -> Dict:
+    """Parse one sheet with ``mapper``, build its processed rows and render its figures"""
+    started = time.perf_counter()
+    result = {'workbook': mapper.workbook_path, 'sheet': sheet_name, 'rows': None, 'figures': [], 'error': None}
+    try:
+        raw_data = mapper.parse_raw_worksheet(sheet_name)
+        table = _as_peptide_table(raw_data['sequences'])
+        starts, _ = table.positions(raw_data['reference'])
+        if build_rows:
+            result['rows'] = mapper.build_processed_rows(raw_data, sample_labels)
+        result.update({
+            'peptides': len(table),
+            'mapped': int((starts >= 0).sum()),
+            'samples': table.num_samples,
+            'total_intensity': float(table.intensities.sum()),
+            'reference_length': len(raw_data['reference'])
+        })
+        if output_prefix is not None:
+            if multiprocessing.current_process().name != 'MainProcess':
+                plt.switch_backend('Agg')  # worker process: render off-screen
+            result['figures'] = mapper.create_visualizations(sheet_name, sample_labels, output_prefix, 
+                                                             top_n_peptides)
+        if return_data:
+            result['raw_data'] = raw_data
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+def _batch_sheets(path: str, worksheets: Optional[List[str]], mapper_options: Dict) -> List[str]:
+    """Sheets of one input to process: the requested ones, or every raw sheet"""
+    mapper = AdvancedCleavageMapper(path, lazy=True, output_mode='processed', **mapper_options)
+    try:
+        available = mapper.sheetnames
+    finally:
+        mapper.close()
+    if worksheets:
+        return [name for name in worksheets if name in available]
+    return [name for name in available if not name.endswith(' PROCESSED')]
+
+def batch_process(inputs,
+                  output_dir: str,
+                  worksheets: Optional[List[str]] = None,
+                  sample_labels: Optional[List[str]] = None,
+                  jobs: Optional[int] = None,
+                  mapper_options: Optional[Dict] = None,
+                  visualize: bool = True) -> pd.DataFrame:
+    """
+    Process many workbooks, one sheet per job on a process pool
+    
+    Each input gets a folder in ``output_dir`` with its processed sheets
+    (``<name>_processed.xlsx``) and figures; ``batch_summary.csv`` lists
+    every sheet with its statistics or error.
+    
+    Args:
+        inputs: Files, directories or glob patterns (see expand_batch_inputs)
+        output_dir: Directory for all results
+        worksheets: Sheet names to process in every workbook (default: all
+            sheets except generated '... PROCESSED' ones)
+        sample_labels: Labels for the samples
+        jobs: Worker processes (default: one per CPU; 1 runs in-process)
+        mapper_options: Keyword arguments for each AdvancedCleavageMapper
+        visualize: Also render each sheet's figures
+    
+    Returns:
+        The summary table, one row per sheet
+    """
+    mapper_options = dict(mapper_options or {})
+    jobs = jobs or os.cpu_count() or 1
+    os.makedirs(output_dir, exist_ok=True)
+    
+    # Plan: one output folder per input, one job per sheet
+    plan = {}
+    records = []
+    for path in expand_batch_inputs(inputs):
+        folder = os.path.join(output_dir, os.path.splitext(os.path.basename(path))[0])
+        while any(folder == planned for planned, _ in plan.values()):
+            folder += '_'
+        try:
+            sheets = _batch_sheets(path, worksheets, mapper_options)
+        except Exception as e:
+            records.append({'workbook': path, 'sheet': None, 'error': f"{type(e).__name__}: {e}"})
+            print(f"❌ {os.path.basename(path)}: {e}")
+            continue
+        if sheets:
+            plan[path] = (folder, sheets)
+            os.makedirs(folder, exist_ok=True)
+        else:
+            records.append({'workbook': path, 'sheet': None, 'error': 'no matching worksheets'})
+    
+    job_args = []
+    for path, (folder, sheets) in plan.items():
+        for sheet in sheets:
+            safe_sheet = sheet.replace(' ', '_').replace('/', '_')
+            prefix = os.path.join(folder, safe_sheet) if visualize else None
+            job_args.append((path, sheet, sample_labels, mapper_options, prefix))
+    
+    print(f"🗂  {len(plan)} input file(s), {len(job_args)} sheet job(s) on {min(jobs, max(len(job_args), 1))} worker(s)")
+    
+    # Finished sheets are held only until their workbook is complete
+    pending = defaultdict(int)
+    for args in job_args:
+        pending[args[0]] += 1
+    finished = defaultdict(dict)
+    
+    def collect(result, done):
+        path, sheet = result['workbook'], result['sheet']
+        label = f"{os.path.basename(path)} :: {sheet}"
+        if result['error']:
+            print(f"❌ [{done}/{len(job_args)}] {label}: {result['error']}")
+        else:
+            print(f"✅ [{done}/{len(job_args)}] {label} ({result['peptides']} peptides, {result['seconds']:.1f}s)")
+        records.append({k: v for k, v in result.items() if k not in ('rows', 'figures')})
+        
+        finished[path][sheet] = result['rows']
+        pending[path] -= 1
+        if pending[path] == 0:
+            folder, sheets = plan[path]
+            rows = finished.pop(path)
+            _write_batch_workbook(path, folder, [(sheet, rows[sheet]) for sheet in sheets], mapper_options)
+    
+    columns = ['workbook', 'sheet', 'peptides', 'mapped', 'samples', 'total_intensity', 
+               'reference_length', 'seconds', 'error']
+    try:
+        if jobs == 1 or len(job_args) <= 1:
+            for done, args in enumerate(job_args, 1):
+                collect(process_sheet_job(*args), done)
+        else:
+            with ProcessPoolExecutor(max_workers=min(jobs, len(job_args))) as pool:
+                futures = {pool.submit(process_sheet_job, *args): args for args in job_args}
+                for done, future in enumerate(as_completed(futures), 1):
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # The worker itself died (e.g. killed out of memory, BrokenProcessPool)
+                        path, sheet = futures[future][:2]
+                        result = {'workbook': path, 'sheet': sheet, 'rows': None, 'figures': [], 
+                                  'error': f"{type(e).__name__}: {e}", 'seconds': 0.0}
+                    collect(result, done)
+    finally:
+        # Written even if the batch is interrupted, covering every finished sheet
+        summary = pd.DataFrame(records, columns=columns)
+        summary.to_csv(os.path.join(output_dir, 'batch_summary.csv'), index=False)
+    
+    failed = int(summary['error'].notna().sum())
+    print(f"📋 Batch summary: {len(summary) - failed} sheet(s) processed, {failed} failed")
+    return summary
+
+def _write_batch_workbook(path: str, 
+                          folder: str, 
+                          sheet_rows: List[Tuple[str, Optional[List[List]]]], 
+                          mapper_options: Dict):
+    """Write the processed sheets of one input (failed sheets skipped) to its output folder"""
+    sheet_rows = [(sheet, rows) for sheet, rows in sheet_rows if rows is not None]
+    if not sheet_rows:
+        return
+    mapper = AdvancedCleavageMapper(path, lazy=True, output_mode='processed', **mapper_options)
+    for sheet, rows in sheet_rows:
+        mapper.write_processed_rows(f"{sheet} PROCESSED", rows)
+    name = os.path.splitext(os.path.basename(path))[0]
+    mapper.save(os.path.join(folder, f"{name}_processed.xlsx"))
+    mapper.close()
+
+
 # ============================================================================
 # EXECUTION EXAMPLES
 # ============================================================================
@@ -15,8 +15,7 @@ import threading
 
 # Try to import required modules
 try:
-    from cleavage_mapper import AdvancedCleavageMapper
-    import pandas as pd
+    from cleavage_mapper import AdvancedCleavageMapper, XlsWorkbook, is_legacy_xls
 except ImportError as e:
     print(f"Missing required packages. Please install with: pip install -r requirements.txt")
     print(f"Error: {e}")
@@ -101,6 +100,13 @@ class CleavageMapperGUI:
         ttk.Checkbutton(options_frame, text="Create comprehensive comparison report", 
                        variable=self.create_comparison).pack(anchor=tk.W)
         
+        jobs_row = ttk.Frame(options_frame)
+        jobs_row.pack(anchor=tk.W, pady=(5,0))
+        self.parallel_jobs = tk.IntVar(value=1)
+        ttk.Label(jobs_row, text="Worksheets processed in parallel:").pack(side=tk.LEFT)
+        ttk.Spinbox(jobs_row, from_=1, to=max(os.cpu_count() or 1, 1), width=4,
+                    textvariable=self.parallel_jobs).pack(side=tk.LEFT, padx=(5,0))
+        
         # Run button
         run_frame = ttk.Frame(self.root, padding="10")
         run_frame.pack(fill=tk.X)
@@ -151,15 +157,14 @@ class CleavageMapperGUI:
             # Try to load the file and get worksheet names
             file_path = self.excel_file.get()
             
-            # Handle old Excel format
-            if file_path.endswith('.xls'):
-                self.log("Converting old Excel format...")
-                excel_file = pd.ExcelFile(file_path, engine='xlrd')
-                worksheets = excel_file.sheet_names
+            # Old Excel (.xls) format is read directly, without conversion
+            if is_legacy_xls(file_path):
+                wb = XlsWorkbook(file_path)
             else:
                 import openpyxl
-                wb = openpyxl.load_workbook(file_path)
-                worksheets = wb.sheetnames
+                wb = openpyxl.load_workbook(file_path, read_only=True)
+            worksheets = wb.sheetnames
+            wb.close()
             
             # Add worksheets to listbox
             for ws in worksheets:
@@ -222,13 +227,8 @@ class CleavageMapperGUI:
             output_dir = Path(self.output_folder.get())
             output_dir.mkdir(exist_ok=True)
             
-            # Convert file if needed
+            # Old Excel (.xls) format is read directly by the mapper
             input_file = self.excel_file.get()
-            if input_file.endswith('.xls'):
-                self.log("Converting Excel file format...")
-                converted_file = output_dir / "converted_data.xlsx"
-                self._convert_excel_file(input_file, str(converted_file))
-                input_file = str(converted_file)
             
             # Initialize mapper
             self.log("Initializing cleavage mapper...")
@@ -236,6 +236,26 @@ class CleavageMapperGUI:
             
             # Process each worksheet
             conditions = []
+            jobs = self.parallel_jobs.get()
+            if jobs > 1 and len(worksheets) > 1:
+                # One worker process per worksheet; processed rows are merged here
+                self.log(f"Processing {len(worksheets)} worksheets on {min(jobs, len(worksheets))} worker processes...")
+                make_figures = any([self.create_heatmaps.get(), self.create_positional.get()])
+                results = mapper.process_sheets(
+                    [(w, f"{w} PROCESSED" if self.create_excel.get() else None) for w in worksheets],
+                    sample_names,
+                    {w: str(output_dir / f"analysis_{w.replace(' ', '_').replace('/', '_')}") 
+                     for w in worksheets} if make_figures else None,
+                    jobs=jobs, top_n_peptides=25
+                )
+                for worksheet, result in zip(worksheets, results):
+                    if result['error']:
+                        self.log(f"✗ Error processing {worksheet}: {result['error']}")
+                    else:
+                        conditions.append((worksheet, worksheet.replace(' mgd glucose', ' mgd')))
+                        self.log(f"✓ Completed: {worksheet}")
+                worksheets = []
+            
             for worksheet in worksheets:
                 self.log(f"Processing worksheet: {worksheet}")
                 
@@ -298,14 +318,6 @@ class CleavageMapperGUI:
             # Re-enable button and stop progress
             self.root.after(0, self._analysis_complete)
     
-    def _convert_excel_file(self, input_file, output_file):
-        """Convert old Excel format to new format"""
-        excel_file = pd.ExcelFile(input_file, engine='xlrd')
-        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-            for sheet_name in excel_file.sheet_names:
-                df = pd.read_excel(excel_file, sheet_name=sheet_name, header=None)
-                df.to_excel(writer, sheet_name=sheet_name, index=False, header=False)
-    
     def _analysis_complete(self):
         """Called when analysis is complete"""
         self.run_button.config(state='normal')
@@ -0,0 +1,55 @@
+"""
+Regression tests for AdvancedCleavageMapper.run_pipeline
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+import openpyxl
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Add src directory to Python path
+sys.path.insert(0, str(ROOT / "src"))
+
+from cleavage_mapper import AdvancedCleavageMapper
+
+DATA = ROOT / "data" / "example_data_converted.xlsx"
+
+
+def _workbook_with_copies(path: Path, copies: int) -> list:
+    wb = openpyxl.load_workbook(DATA)
+    names = [f'copy {i}' for i in range(copies)]
+    for name in names:
+        wb.copy_worksheet(wb['200 mgd glucose']).title = name
+    wb.save(path)
+    return names
+
+
+def test_write_error_is_reported_per_sheet_and_does_not_hang(tmp_path):
+    workbook = tmp_path / "copies.xlsx"
+    names = _workbook_with_copies(workbook, 8)
+    mapper = AdvancedCleavageMapper(str(workbook), output_mode='processed')
+    # Every write after the first fails on the repeated output sheet, with
+    # more sheets still queued than the stages can hold
+    sheets = [(name, 'PROCESSED') for name in names]
+    outcome = {}
+    
+    runner = threading.Thread(
+        target=lambda: outcome.setdefault('results', mapper.run_pipeline(
+            sheets, output_path=str(tmp_path / "out.xlsx"), queue_size=2)),
+        daemon=True
+    )
+    runner.start()
+    runner.join(timeout=120)
+    
+    assert not runner.is_alive(), "run_pipeline hung after a write error"
+    results = outcome['results']
+    assert [result['sheet'] for result in results] == names
+    assert results[0]['error'] is None
+    assert results[0]['rows'] > 0
+    for result in results[1:]:
+        assert result['error'].startswith('ValueError')
+        assert result['rows'] == 0
+    assert openpyxl.load_workbook(tmp_path / "out.xlsx").sheetnames == ['PROCESSED']